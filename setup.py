@@ -8,11 +8,10 @@ long_description = readme_path.read_text(encoding="utf-8") if readme_path.exists
 
 requirements_path = Path(__file__).parent / "requirements.txt"
 if requirements_path.exists():
-    with open(requirements_path, encoding="utf-8") as f:
-        requirements = [
-            line.strip() for line in f 
-            if line.strip() and not line.startswith("#")
-        ]
+    requirements = [
+        req for line in requirements_path.read_text(encoding="utf-8").splitlines()
+        if (req := line.strip()) and not req.startswith("#")
+    ]
 else:
     requirements = ["openai>=1.0.0", "numpy>=1.24.0"]
 
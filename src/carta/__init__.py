@@ -8,7 +8,15 @@ using semantic embeddings and recursive tree structures.
 __version__ = "0.1.0"
 __author__ = "Inside The Black Box LLC"
 
-from .parser.parser import CartaParser
-from .embedder.embedder import CartaEmbedder
-
 __all__ = ["CartaParser", "CartaEmbedder"]
+
+
+def __getattr__(name):
+    """Resolve public classes on first access to keep package import cheap."""
+    if name == "CartaParser":
+        from .parser.parser import CartaParser
+        return CartaParser
+    if name == "CartaEmbedder":
+        from .embedder.embedder import CartaEmbedder
+        return CartaEmbedder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
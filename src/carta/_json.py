@@ -0,0 +1,14 @@
+"""JSON decoding shared by the parser and embedder."""
+
+import json
+from typing import Any
+
+import orjson
+
+
+def loads(raw: bytes) -> Any:
+    """Decode JSON with orjson, falling back to json for lone surrogate escapes orjson rejects."""
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
@@ -8,11 +8,11 @@ semantic embeddings from conversation trees.
 import argparse
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional
 
-from ..parser import CartaParser
-from ..embedder import CartaEmbedder
-from ..config import Config
+from .. import __version__
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +26,17 @@ def setup_logging(level: str = "INFO") -> None:
     )
 
 
+def _version_requested() -> bool:
+    """Check for a bare version flag before any parser is built."""
+    return len(sys.argv) >= 2 and sys.argv[1] in ('-V', '--version')
+
+
 def parse_cli() -> None:
     """Parse ChatGPT JSON exports into conversation trees."""
+    if _version_requested():
+        print(__version__)
+        return
+
     parser = argparse.ArgumentParser(
         description='Parse ChatGPT JSON exports into recursive conversation trees.'
     )
@@ -40,19 +49,35 @@ def parse_cli() -> None:
         '-o', '--output-dir',
         help='Output directory for parsed files'
     )
+    parser.add_argument(
+        '--prune-hidden',
+        action='store_true',
+        help='Drop subtrees made only of system, empty or hidden nodes'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        help='Reuse parse results for unchanged exports from this directory'
+    )
     parser.add_argument(
         '--log-level',
         default='INFO',
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
         help='Set logging level'
     )
+    parser.add_argument('-V', '--version', action='version', version=__version__)
 
     args = parser.parse_args()
+
+    from ..parser import CartaParser
+    from ..config import get_config
+
     setup_logging(args.log_level)
-    config = Config()
+    config = get_config()
 
     carta_parser = CartaParser(
-        output_dir=args.output_dir or str(config.default_output_dir)
+        output_dir=args.output_dir or str(config.default_output_dir),
+        prune_hidden=args.prune_hidden,
+        cache_dir=args.cache_dir
     )
 
     for input_file in args.input_files:
@@ -71,8 +96,13 @@ def parse_cli() -> None:
         else:
             logger.error(f"Failed to parse {input_file}")
 
+
 def embed_cli() -> None:
     """CLI command for generating embeddings from parsed conversation trees."""
+    if _version_requested():
+        print(__version__)
+        return
+
     parser = argparse.ArgumentParser(
         description='Generate semantic embeddings for parsed conversation trees.'
     )
@@ -94,17 +124,34 @@ def embed_cli() -> None:
         default='text-embedding-3-large',
         help='OpenAI embedding model to use'
     )
+    parser.add_argument(
+        '-j', '--workers',
+        type=int,
+        default=4,
+        help='Number of files to embed concurrently'
+    )
+    parser.add_argument(
+        '--ancestry-workers',
+        type=int,
+        default=0,
+        help='Worker processes for semantic ancestry metrics (0 runs them in-process)'
+    )
     parser.add_argument(
         '--log-level',
         default='INFO',
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
         help='Set logging level'
     )
+    parser.add_argument('-V', '--version', action='version', version=__version__)
 
     args = parser.parse_args()
+
+    from ..embedder import CartaEmbedder
+    from ..config import get_config
+
     setup_logging(args.log_level)
 
-    config = Config()
+    config = get_config()
     api_key = args.api_key or config.openai_api_key
     if not api_key:
         logger.error("No OpenAI API key provided")
@@ -119,27 +166,53 @@ def embed_cli() -> None:
         logger.error(f"Embedder initialization failed: {e}")
         sys.exit(1)
 
-    for input_file in args.input_files:
-        input_path = Path(input_file)
-        if not input_path.exists():
-            logger.error(f"Input file not found: {input_file}")
-            continue
+    def embed_file(input_path: Path) -> Path:
+        # process_file streams, so each worker writes conversations as they finish
+        output_filename = input_path.stem.replace('_parsed', '') + '_embedded.json'
+        output_path = output_dir / output_filename
+        conversations = embedder.process_file(str(input_path), ancestry_workers=args.ancestry_workers)
+        if not embedder.save_to_json(conversations, str(output_path)):
+            raise RuntimeError(f"no embeddings written to {output_path}")
+        return output_path
+
+    # Embedding is network-bound, so overlap files and report each as it completes
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {}
+        for input_file in args.input_files:
+            input_path = Path(input_file)
+            if not input_path.exists():
+                logger.error(f"Input file not found: {input_file}")
+                failed += 1
+                continue
+            futures[executor.submit(embed_file, input_path)] = input_path
+
+        for future in as_completed(futures):
+            input_path = futures[future]
+            try:
+                output_path = future.result()
+                logger.info(f"Saved embeddings to {output_path}")
+            except Exception as e:
+                logger.error(f"Embedding failed for {input_path}: {e}")
+                failed += 1
+
+    if failed:
+        logger.error(f"{failed} of {len(args.input_files)} files failed")
+        sys.exit(1)
+
+
+def _sniff_subcommand() -> Optional[str]:
+    """Pop the subcommand name from argv without building any parser."""
+    if len(sys.argv) > 1 and sys.argv[1] in ('parse', 'embed'):
+        return sys.argv.pop(1)
+    return None
 
-        try:
-            enriched_data = embedder.process_file(str(input_path))
-            output_filename = input_path.stem.replace('_parsed', '') + '_embedded.json'
-            output_path = output_dir / output_filename
-            embedder.save_to_json(enriched_data, str(output_path))
-            logger.info(f"Saved embeddings to {output_path}")
-        except Exception as e:
-            logger.error(f"Embedding failed for {input_file}: {e}")
 
 if __name__ == '__main__':
-    if len(sys.argv) > 1 and sys.argv[1] == 'parse':
-        sys.argv.pop(1)
+    command = _sniff_subcommand()
+    if command == 'parse':
         parse_cli()
-    elif len(sys.argv) > 1 and sys.argv[1] == 'embed':
-        sys.argv.pop(1)
+    elif command == 'embed':
         embed_cli()
     else:
         print("Usage: python -m carta.cli parse|embed [options]")
@@ -1,5 +1,5 @@
 """Carta configuration management."""
 
-from .config import Config
+from .config import Config, get_config
 
-__all__ = ["Config"]
+__all__ = ["Config", "get_config"]
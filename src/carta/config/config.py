@@ -1,9 +1,10 @@
 """Configuration management with environment variable support."""
 
 import os
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Optional
-from urllib.parse import urlparse
+from urllib.parse import ParseResult, urlparse
 
 try:
     from dotenv import load_dotenv
@@ -13,67 +14,76 @@ except ImportError:
 
 
 class Config:
-    """Centralized configuration management."""
+    """Centralized configuration management.
+
+    Values are read from the environment once per instance and cached;
+    environment changes made after first access are not picked up.
+    """
     
-    @property
+    @cached_property
     def openai_api_key(self) -> Optional[str]:
         """Retrieve OpenAI API key from environment."""
         return os.environ.get("OPENAI_API_KEY")
     
-    @property
+    @cached_property
     def default_embedding_model(self) -> str:
         """Default embedding model name."""
         return os.environ.get("CARTA_EMBEDDING_MODEL", "text-embedding-3-large")
     
-    @property
+    @cached_property
     def default_output_dir(self) -> Path:
         """Base output directory path."""
         return Path(os.environ.get("CARTA_OUTPUT_DIR", "output"))
     
-    @property
+    @cached_property
     def log_level(self) -> str:
         """Application logging level."""
         return os.environ.get("CARTA_LOG_LEVEL", "INFO")
     
-    @property
+    @cached_property
     def database_url(self) -> Optional[str]:
         """Database connection URL."""
         return os.environ.get("DATABASE_URL")
     
-    @property
+    @cached_property
+    def _parsed_db_url(self) -> Optional[ParseResult]:
+        """Database URL parsed once for the database_* properties."""
+        return urlparse(self.database_url) if self.database_url else None
+    
+    @cached_property
     def database_host(self) -> str:
         """Database hostname."""
-        if self.database_url:
-            return urlparse(self.database_url).hostname or "localhost"
+        if self._parsed_db_url:
+            return self._parsed_db_url.hostname or "localhost"
         return os.environ.get("DB_HOST", "localhost")
     
-    @property
+    @cached_property
     def database_port(self) -> int:
         """Database connection port."""
-        if self.database_url:
-            return urlparse(self.database_url).port or 5432
+        if self._parsed_db_url:
+            return self._parsed_db_url.port or 5432
         return int(os.environ.get("DB_PORT", "5432"))
     
-    @property
+    @cached_property
     def database_name(self) -> str:
         """Database name."""
-        if self.database_url:
-            parsed = urlparse(self.database_url)
+        parsed = self._parsed_db_url
+        if parsed:
             return parsed.path.lstrip('/') if parsed.path else "carta"
         return os.environ.get("DB_NAME", "carta")
     
-    @property
+    @cached_property
     def database_user(self) -> str:
         """Database username."""
-        if self.database_url:
-            return urlparse(self.database_url).username or "carta_service"
+        if self._parsed_db_url:
+            return self._parsed_db_url.username or "carta_service"
         return os.environ.get("DB_USER", "carta_service")
     
-    @property
+    @cached_property
     def database_password(self) -> Optional[str]:
         """Database password."""
-        if self.database_url:
-            return urlparse(self.database_url).password
+        if self._parsed_db_url:
+            return self._parsed_db_url.password
         return os.environ.get("DB_PASSWORD")
     
     def validate(self) -> bool:
@@ -90,4 +100,10 @@ class Config:
     
     def get_missing_database_config(self) -> list[str]:
         """List missing database configuration keys."""
-        return ["DATABASE_URL or DB_PASSWORD"] if not (self.database_password or self.database_url) else []
\ No newline at end of file
+        return ["DATABASE_URL or DB_PASSWORD"] if not (self.database_password or self.database_url) else []
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Return the process-wide shared Config instance."""
+    return Config()
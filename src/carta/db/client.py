@@ -1,32 +1,153 @@
 """PostgreSQL client for conversation data persistence."""
 
+import io
 import logging
+import threading
 import uuid
+import weakref
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
-import json
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
 
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from psycopg2.extras import DictCursor, execute_values
-import psycopg2.sql
+import orjson
 
-from ..config import Config
+from ..config import Config, get_config
+
+if TYPE_CHECKING:
+    from psycopg2.extras import Json
+    from psycopg2.pool import ThreadedConnectionPool
 
 logger = logging.getLogger(__name__)
 
+# embedding_generated_at is stamped by Postgres; records carry a has-embedding flag
+_GENERATED_AT = "CASE WHEN %s THEN now() END"
+
+# Row templates for execute_values (38 node columns, 28 pair columns)
+_NODE_TMPL = "(" + ",".join(["%s"] * 14 + [_GENERATED_AT] + ["%s"] * 23) + ")"
+_PAIR_TMPL = "(" + ",".join(["%s"] * 17 + [_GENERATED_AT] + ["%s"] * 10) + ")"
+
+_PREPARE_CONVERSATION = """
+    PREPARE carta_ins_conv AS
+    INSERT INTO carta.conversations (
+        id, title, create_time, update_time, default_model_slug,
+        current_node, root_id, description, metadata, embedding_model_version
+    ) VALUES (
+        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10
+    ) ON CONFLICT (id) DO UPDATE SET
+        title = EXCLUDED.title,
+        update_time = EXCLUDED.update_time,
+        current_node = EXCLUDED.current_node,
+        metadata = EXCLUDED.metadata
+"""
+_EXECUTE_CONVERSATION = "EXECUTE carta_ins_conv (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+_NODE_COLUMNS = """
+    id, conversation_id, parent_id, role, content, content_type, create_time,
+    model_slug, requested_model_slug, is_visually_hidden, reasoning_status,
+    voice_mode_message, embedding, embedding_model_version, embedding_generated_at,
+    is_mainline, is_terminal, siblings_count, branch_depth, path_from_root,
+    turn_number, generation_type, mainline_divergence_point, replaced_node_id,
+    semantic_distance_from_parent, avg_sibling_semantic_distance, semantic_drift_since_root,
+    semantic_acceleration, branch_entropy, seconds_since_parent, turn_density_ratio,
+    sibling_lineage_continuation_rate, sibling_semantic_convergence_pattern,
+    edit_chain_depth, cognitive_load_signature, node_spark_factor,
+    children_ids, additional_metadata
+"""
+
+_NODE_CONFLICT = """
+    ON CONFLICT (id) DO UPDATE SET
+        content = EXCLUDED.content,
+        embedding = EXCLUDED.embedding,
+        embedding_model_version = EXCLUDED.embedding_model_version,
+        embedding_generated_at = EXCLUDED.embedding_generated_at,
+        semantic_distance_from_parent = EXCLUDED.semantic_distance_from_parent,
+        avg_sibling_semantic_distance = EXCLUDED.avg_sibling_semantic_distance,
+        semantic_drift_since_root = EXCLUDED.semantic_drift_since_root,
+        semantic_acceleration = EXCLUDED.semantic_acceleration,
+        branch_entropy = EXCLUDED.branch_entropy,
+        cognitive_load_signature = EXCLUDED.cognitive_load_signature,
+        node_spark_factor = EXCLUDED.node_spark_factor
+"""
+
+_PAIR_COLUMNS = """
+    id, conversation_id, prompt_id, response_id, is_mainline, is_alternate,
+    is_terminal_arc, branch_depth, generation_type, divergence_point,
+    divergence_turn, exchange_position_in_branch, alternative_count,
+    branch_signature_pattern, path_from_root, embedding, embedding_model_version,
+    embedding_generated_at, coherence_score, semantic_drift, semantic_drift_from_root,
+    abstraction_delta, dialogic_continuity_score, relative_entropy_to_siblings,
+    downstream_spark_factor, turn_latency, time_since_previous_pair, additional_metadata
+"""
+
+_PAIR_CONFLICT = """
+    ON CONFLICT (prompt_id, response_id) DO UPDATE SET
+        embedding = EXCLUDED.embedding,
+        embedding_model_version = EXCLUDED.embedding_model_version,
+        embedding_generated_at = EXCLUDED.embedding_generated_at,
+        coherence_score = EXCLUDED.coherence_score,
+        semantic_drift = EXCLUDED.semantic_drift,
+        semantic_drift_from_root = EXCLUDED.semantic_drift_from_root,
+        abstraction_delta = EXCLUDED.abstraction_delta,
+        dialogic_continuity_score = EXCLUDED.dialogic_continuity_score,
+        relative_entropy_to_siblings = EXCLUDED.relative_entropy_to_siblings,
+        downstream_spark_factor = EXCLUDED.downstream_spark_factor
+"""
+
+
+def _dumps(value: Any) -> str:
+    """Serialize a value to JSON text with orjson."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _jsonb(value: Any) -> 'Json':
+    """Wrap a value for jsonb adaptation, encoded by orjson."""
+    from psycopg2.extras import Json
+    return Json(value, dumps=_dumps)
+
+
+# Batches at or above this size are streamed with COPY instead of INSERT ... VALUES
+COPY_THRESHOLD = 500
+
+# Escapes for PostgreSQL COPY text format
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_text(value: Any, ndarray: type, json_type: type) -> str:
+    """Render a single value as a COPY text-format field.
+
+    ndarray and json_type are numpy.ndarray and psycopg2.extras.Json, resolved
+    once by the caller so the per-field path does no imports.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    if isinstance(value, (list, ndarray)):
+        # pgvector text representation
+        return '[' + ','.join(map(str, value)) + ']'
+    if isinstance(value, json_type):
+        value = value.dumps(value.adapted)
+    return str(value).translate(_COPY_ESCAPES)
+
 
 class DatabaseClient:
     """PostgreSQL client for conversation data operations."""
     
     def __init__(self, config: Optional[Config] = None):
         """Initialize database client with configuration."""
-        self.config = config or Config()
+        self.config = config or get_config()
         
         if not self.config.validate_database():
             missing = self.config.get_missing_database_config()
             raise ValueError(f"Missing database configuration: {', '.join(missing)}")
+        
+        # psycopg2 is imported and the pool opened on first use
+        self._pool: Optional['ThreadedConnectionPool'] = None
+        self._pool_lock = threading.Lock()
+        self._prepared_connections = weakref.WeakSet()
+        self._adapted_connections = weakref.WeakSet()
     
     def get_connection_params(self) -> Dict[str, Any]:
         """Return psycopg2 connection parameters."""
@@ -35,40 +156,66 @@ class DatabaseClient:
             'port': self.config.database_port,
             'database': self.config.database_name,
             'user': self.config.database_user,
-            'password': self.config.database_password,
-            'cursor_factory': DictCursor
+            'password': self.config.database_password
         }
     
+    def _get_pool(self) -> 'ThreadedConnectionPool':
+        """Return the connection pool, creating it on first call."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    from psycopg2.pool import ThreadedConnectionPool
+                    
+                    self._pool = ThreadedConnectionPool(
+                        minconn=1, maxconn=8, **self.get_connection_params()
+                    )
+        return self._pool
+    
     @contextmanager
     def get_connection(self):
-        """Database connection context manager with error handling."""
+        """Pooled database connection context manager with error handling."""
+        pool = self._get_pool()
         conn = None
         try:
-            conn = psycopg2.connect(**self.get_connection_params())
-            logger.debug("Database connection established")
+            conn = pool.getconn()
+            if conn not in self._adapted_connections:
+                from pgvector.psycopg2 import register_vector
+                from psycopg2.extras import register_default_jsonb
+                
+                # Native pgvector adapter; ndarray embeddings encode in one pass
+                register_vector(conn)
+                # Decode jsonb results with orjson, on this client's connections only
+                register_default_jsonb(conn, loads=orjson.loads)
+                self._adapted_connections.add(conn)
+            logger.debug("Database connection acquired from pool")
             yield conn
         except Exception as e:
             logger.error(f"Database connection error: {e}")
-            if conn:
+            if conn and not conn.closed:
                 conn.rollback()
             raise
         finally:
             if conn:
-                conn.close()
-                logger.debug("Database connection closed")
+                pool.putconn(conn, close=bool(conn.closed))
+                logger.debug("Database connection returned to pool")
+    
+    def close(self) -> None:
+        """Close all pooled connections."""
+        if self._pool is not None and not self._pool.closed:
+            self._pool.closeall()
     
     @contextmanager
-    def get_cursor(self, conn=None):
-        """Database cursor context manager."""
+    def get_cursor(self, conn=None, cursor_factory=None):
+        """Database cursor context manager; plain tuple rows unless a factory is given."""
         if conn:
-            cursor = conn.cursor()
+            cursor = conn.cursor(cursor_factory=cursor_factory)
             try:
                 yield cursor
             finally:
                 cursor.close()
         else:
             with self.get_connection() as connection:
-                with connection.cursor() as cursor:
+                with connection.cursor(cursor_factory=cursor_factory) as cursor:
                     yield cursor
     
     def test_connection(self) -> bool:
@@ -84,8 +231,25 @@ class DatabaseClient:
             logger.error(f"Database connection test failed: {e}")
             return False
     
+    @contextmanager
+    def _cursor_scope(self, conn=None):
+        """Yield a cursor on conn, or on a pooled connection committed on exit."""
+        if conn:
+            with self.get_cursor(conn) as cursor:
+                yield cursor
+        else:
+            with self.get_connection() as connection:
+                with self.get_cursor(connection) as cursor:
+                    yield cursor
+                connection.commit()
+    
     def insert_conversation(self, conversation_data: Dict[str, Any], conn=None) -> str:
         """Insert conversation record, return conversation ID."""
+        with self._cursor_scope(conn) as cursor:
+            return self._insert_conversation_with_cursor(cursor, conversation_data)
+    
+    def _insert_conversation_with_cursor(self, cursor, conversation_data: Dict[str, Any]) -> str:
+        """Upsert the conversation record on an open cursor."""
         conversation = conversation_data.get('conversation', {})
         
         # Convert Unix timestamps to datetime objects
@@ -98,27 +262,13 @@ class DatabaseClient:
         if 'update_time' in conversation and conversation['update_time']:
             update_time = datetime.fromtimestamp(conversation['update_time'])
         
-        if not create_time:
-            create_time = datetime.now()
-        if not update_time:
-            update_time = datetime.now()
+        if not create_time or not update_time:
+            now = datetime.now()
+            create_time = create_time or now
+            update_time = update_time or now
         
         conversation_id = conversation.get('id') or str(uuid.uuid4())
         
-        insert_query = """
-            INSERT INTO carta.conversations (
-                id, title, create_time, update_time, default_model_slug,
-                current_node, root_id, description, metadata, embedding_model_version
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            ) ON CONFLICT (id) DO UPDATE SET
-                title = EXCLUDED.title,
-                update_time = EXCLUDED.update_time,
-                current_node = EXCLUDED.current_node,
-                metadata = EXCLUDED.metadata
-            RETURNING id
-        """
-        
         values = (
             conversation_id,
             conversation.get('title', 'Untitled Conversation'),
@@ -128,22 +278,19 @@ class DatabaseClient:
             conversation.get('current_node'),
             conversation.get('root_id'),
             conversation.get('description'),
-            json.dumps(conversation.get('metadata', {})),
+            _jsonb(conversation.get('metadata', {})),
             self.config.default_embedding_model
         )
         
-        if conn:
-            with self.get_cursor(conn) as cursor:
-                cursor.execute(insert_query, values)
-                result = cursor.fetchone()
-                return result['id']
-        else:
-            with self.get_connection() as connection:
-                with self.get_cursor(connection) as cursor:
-                    cursor.execute(insert_query, values)
-                    result = cursor.fetchone()
-                    connection.commit()
-                    return result['id']
+        # Parse and plan the upsert once per pooled connection
+        connection = cursor.connection
+        if connection not in self._prepared_connections:
+            cursor.execute(_PREPARE_CONVERSATION)
+            self._prepared_connections.add(connection)
+        
+        # The ID is always known client-side, so no RETURNING round-trip is needed
+        cursor.execute(_EXECUTE_CONVERSATION, values)
+        return conversation_id
     
     def insert_nodes(self, conversation_id: str, nodes_data: Dict[str, Dict[str, Any]], conn=None) -> None:
         """Bulk insert conversation nodes."""
@@ -151,24 +298,41 @@ class DatabaseClient:
             logger.warning("No nodes to insert")
             return
         
+        with self._cursor_scope(conn) as cursor:
+            self._insert_nodes_with_cursor(cursor, conversation_id, nodes_data)
+    
+    def _insert_nodes_with_cursor(self, cursor, conversation_id: str,
+                                  nodes_data: Dict[str, Dict[str, Any]]) -> None:
+        """Bulk upsert conversation nodes on an open cursor."""
+        node_records = self._node_records(conversation_id, nodes_data)
+        self._bulk_upsert(cursor, 'carta.nodes', _NODE_COLUMNS, _NODE_CONFLICT,
+                          node_records, _NODE_TMPL)
+        
+        logger.info(f"Inserted {len(node_records)} nodes for conversation {conversation_id}")
+    
+    def _node_records(self, conversation_id: str, nodes_data: Dict[str, Dict[str, Any]]) -> List[Tuple]:
+        """Build carta.nodes rows for one conversation."""
+        import numpy as np
+
+        # Fallback timestamp is loop-invariant; bind once for the whole batch
+        now = datetime.now()
+        fromtimestamp = datetime.fromtimestamp
+        
         node_records = []
         for node_id, node in nodes_data.items():
-            create_time = None
-            if 'create_time' in node and node['create_time']:
-                create_time = datetime.fromtimestamp(node['create_time'])
-            else:
-                create_time = datetime.now()
+            node_create_time = node.get('create_time')
+            create_time = fromtimestamp(node_create_time) if node_create_time else now
             
             derived = node.get('derived', {})
             
             embedding = node.get('embedding')
-            embedding_generated_at = datetime.now() if embedding else None
+            has_embedding = embedding is not None
             
             record = (
                 node_id,
                 conversation_id,
                 node.get('parent_id'),
-                node.get('role', 'unknown'),
+                node.get('role') or 'unknown',
                 node.get('content', ''),
                 node.get('content_type', 'text'),
                 create_time,
@@ -177,14 +341,14 @@ class DatabaseClient:
                 node.get('is_visually_hidden', False),
                 node.get('reasoning_status'),
                 node.get('voice_mode_message', False),
-                embedding,
-                self.config.default_embedding_model if embedding else None,
-                embedding_generated_at,
+                np.asarray(embedding, dtype=np.float32) if has_embedding else None,
+                self.config.default_embedding_model if has_embedding else None,
+                has_embedding,
                 derived.get('is_mainline', False),
                 derived.get('is_terminal', False),
                 derived.get('siblings_count', 0),
                 derived.get('branch_depth', 0),
-                json.dumps(derived.get('path_from_root', [])),
+                _jsonb(derived.get('path_from_root', [])),
                 derived.get('turn_number', 0),
                 derived.get('generation_type', 'unknown'),
                 derived.get('mainline_divergence_point'),
@@ -201,48 +365,12 @@ class DatabaseClient:
                 derived.get('edit_chain_depth'),
                 derived.get('cognitive_load_signature'),
                 derived.get('node_spark_factor'),
-                json.dumps(derived.get('children_ids', [])),
-                json.dumps(node.get('additional_metadata', {}))
+                _jsonb(derived.get('children_ids', [])),
+                _jsonb(node.get('additional_metadata', {}))
             )
             node_records.append(record)
         
-        insert_query = """
-            INSERT INTO carta.nodes (
-                id, conversation_id, parent_id, role, content, content_type, create_time,
-                model_slug, requested_model_slug, is_visually_hidden, reasoning_status,
-                voice_mode_message, embedding, embedding_model_version, embedding_generated_at,
-                is_mainline, is_terminal, siblings_count, branch_depth, path_from_root,
-                turn_number, generation_type, mainline_divergence_point, replaced_node_id,
-                semantic_distance_from_parent, avg_sibling_semantic_distance, semantic_drift_since_root,
-                semantic_acceleration, branch_entropy, seconds_since_parent, turn_density_ratio,
-                sibling_lineage_continuation_rate, sibling_semantic_convergence_pattern,
-                edit_chain_depth, cognitive_load_signature, node_spark_factor,
-                children_ids, additional_metadata
-            ) VALUES %s
-            ON CONFLICT (id) DO UPDATE SET
-                content = EXCLUDED.content,
-                embedding = EXCLUDED.embedding,
-                embedding_model_version = EXCLUDED.embedding_model_version,
-                embedding_generated_at = EXCLUDED.embedding_generated_at,
-                semantic_distance_from_parent = EXCLUDED.semantic_distance_from_parent,
-                avg_sibling_semantic_distance = EXCLUDED.avg_sibling_semantic_distance,
-                semantic_drift_since_root = EXCLUDED.semantic_drift_since_root,
-                semantic_acceleration = EXCLUDED.semantic_acceleration,
-                branch_entropy = EXCLUDED.branch_entropy,
-                cognitive_load_signature = EXCLUDED.cognitive_load_signature,
-                node_spark_factor = EXCLUDED.node_spark_factor
-        """
-        
-        if conn:
-            with self.get_cursor(conn) as cursor:
-                execute_values(cursor, insert_query, node_records, template=None, page_size=100)
-        else:
-            with self.get_connection() as connection:
-                with self.get_cursor(connection) as cursor:
-                    execute_values(cursor, insert_query, node_records, template=None, page_size=100)
-                    connection.commit()
-        
-        logger.info(f"Inserted {len(node_records)} nodes for conversation {conversation_id}")
+        return node_records
     
     def insert_pairs(self, conversation_id: str, pairs_data: List[Dict[str, Any]], conn=None) -> None:
         """Bulk insert conversation pairs."""
@@ -250,6 +378,22 @@ class DatabaseClient:
             logger.warning("No pairs to insert")
             return
         
+        with self._cursor_scope(conn) as cursor:
+            self._insert_pairs_with_cursor(cursor, conversation_id, pairs_data)
+    
+    def _insert_pairs_with_cursor(self, cursor, conversation_id: str,
+                                  pairs_data: List[Dict[str, Any]]) -> None:
+        """Bulk upsert conversation pairs on an open cursor."""
+        pair_records = self._pair_records(conversation_id, pairs_data)
+        self._bulk_upsert(cursor, 'carta.pairs', _PAIR_COLUMNS, _PAIR_CONFLICT,
+                          pair_records, _PAIR_TMPL)
+        
+        logger.info(f"Inserted {len(pair_records)} pairs for conversation {conversation_id}")
+    
+    def _pair_records(self, conversation_id: str, pairs_data: List[Dict[str, Any]]) -> List[Tuple]:
+        """Build carta.pairs rows for one conversation."""
+        import numpy as np
+
         pair_records = []
         for pair in pairs_data:
             pair_id = str(uuid.uuid4())
@@ -257,7 +401,7 @@ class DatabaseClient:
             derived = pair.get('derived', {})
             
             embedding = pair.get('embedding')
-            embedding_generated_at = datetime.now() if embedding else None
+            has_embedding = embedding is not None
             
             record = (
                 pair_id,
@@ -274,10 +418,10 @@ class DatabaseClient:
                 derived.get('exchange_position_in_branch'),
                 derived.get('alternative_count', 0),
                 derived.get('branch_signature_pattern'),
-                json.dumps(derived.get('path_from_root', [])),
-                embedding,
-                self.config.default_embedding_model if embedding else None,
-                embedding_generated_at,
+                _jsonb(derived.get('path_from_root', [])),
+                np.asarray(embedding, dtype=np.float32) if has_embedding else None,
+                self.config.default_embedding_model if has_embedding else None,
+                has_embedding,
                 derived.get('coherence_score'),
                 derived.get('semantic_drift'),
                 derived.get('semantic_drift_from_root'),
@@ -287,43 +431,52 @@ class DatabaseClient:
                 derived.get('downstream_spark_factor'),
                 derived.get('turn_latency'),
                 derived.get('time_since_previous_pair'),
-                json.dumps(pair.get('additional_metadata', {}))
+                _jsonb(pair.get('additional_metadata', {}))
             )
             pair_records.append(record)
         
-        insert_query = """
-            INSERT INTO carta.pairs (
-                id, conversation_id, prompt_id, response_id, is_mainline, is_alternate,
-                is_terminal_arc, branch_depth, generation_type, divergence_point,
-                divergence_turn, exchange_position_in_branch, alternative_count,
-                branch_signature_pattern, path_from_root, embedding, embedding_model_version,
-                embedding_generated_at, coherence_score, semantic_drift, semantic_drift_from_root,
-                abstraction_delta, dialogic_continuity_score, relative_entropy_to_siblings,
-                downstream_spark_factor, turn_latency, time_since_previous_pair, additional_metadata
-            ) VALUES %s
-            ON CONFLICT (prompt_id, response_id) DO UPDATE SET
-                embedding = EXCLUDED.embedding,
-                embedding_model_version = EXCLUDED.embedding_model_version,
-                embedding_generated_at = EXCLUDED.embedding_generated_at,
-                coherence_score = EXCLUDED.coherence_score,
-                semantic_drift = EXCLUDED.semantic_drift,
-                semantic_drift_from_root = EXCLUDED.semantic_drift_from_root,
-                abstraction_delta = EXCLUDED.abstraction_delta,
-                dialogic_continuity_score = EXCLUDED.dialogic_continuity_score,
-                relative_entropy_to_siblings = EXCLUDED.relative_entropy_to_siblings,
-                downstream_spark_factor = EXCLUDED.downstream_spark_factor
-        """
+        return pair_records
+    
+    def _bulk_upsert(self, cursor, table: str, columns: str, conflict_clause: str,
+                     records: List[Tuple], template: str) -> None:
+        """Upsert records, streaming large batches through COPY."""
+        if len(records) < COPY_THRESHOLD:
+            from psycopg2.extras import execute_values
+            
+            insert_query = f"INSERT INTO {table} ({columns}) VALUES %s {conflict_clause}"
+            execute_values(cursor, insert_query, records, template=template, page_size=1000)
+            return
         
-        if conn:
-            with self.get_cursor(conn) as cursor:
-                execute_values(cursor, insert_query, pair_records, template=None, page_size=100)
-        else:
-            with self.get_connection() as connection:
-                with self.get_cursor(connection) as cursor:
-                    execute_values(cursor, insert_query, pair_records, template=None, page_size=100)
-                    connection.commit()
+        # COPY cannot resolve conflicts, so stage rows and upsert in one statement
+        staging = table.replace('.', '_') + '_staging'
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+            f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
         
-        logger.info(f"Inserted {len(pair_records)} pairs for conversation {conversation_id}")
+        # The has-embedding flag is not copied; the stamp is derived from embedding
+        names = [name.strip() for name in columns.split(',')]
+        stamp = names.index('embedding_generated_at')
+        copy_columns = ', '.join(names[:stamp] + names[stamp + 1:])
+        select_list = ', '.join(
+            names[:stamp] + ['CASE WHEN embedding IS NOT NULL THEN now() END'] + names[stamp + 1:]
+        )
+        
+        import numpy as np
+        from psycopg2.extras import Json
+        
+        buffer = io.StringIO()
+        for record in records:
+            buffer.write('\t'.join([
+                _copy_text(value, np.ndarray, Json) for value in record[:stamp] + record[stamp + 1:]
+            ]))
+            buffer.write('\n')
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {staging} ({copy_columns}) FROM STDIN", buffer)
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {select_list} FROM {staging} {conflict_clause}"
+        )
+        cursor.execute(f"TRUNCATE {staging}")
     
     def store_conversation(self, conversation_data: Dict[str, Any]) -> str:
         """Store complete conversation with transactional consistency."""
@@ -331,16 +484,17 @@ class DatabaseClient:
         
         with self.get_connection() as conn:
             try:
-                conversation_id = self.insert_conversation(conversation_data, conn)
-                logger.info(f"Stored conversation {conversation_id}")
-                
-                nodes_data = conversation_data.get('nodes', {})
-                if nodes_data:
-                    self.insert_nodes(conversation_id, nodes_data, conn)
-                
-                pairs_data = conversation_data.get('pairs', [])
-                if pairs_data:
-                    self.insert_pairs(conversation_id, pairs_data, conn)
+                with self.get_cursor(conn) as cursor:
+                    conversation_id = self._insert_conversation_with_cursor(cursor, conversation_data)
+                    logger.info(f"Stored conversation {conversation_id}")
+                    
+                    nodes_data = conversation_data.get('nodes', {})
+                    if nodes_data:
+                        self._insert_nodes_with_cursor(cursor, conversation_id, nodes_data)
+                    
+                    pairs_data = conversation_data.get('pairs', [])
+                    if pairs_data:
+                        self._insert_pairs_with_cursor(cursor, conversation_id, pairs_data)
                 
                 conn.commit()
                 logger.info(f"Successfully stored conversation {conversation_id} with {len(nodes_data)} nodes and {len(pairs_data)} pairs")
@@ -352,6 +506,53 @@ class DatabaseClient:
                 conn.rollback()
                 raise
     
+    def store_conversations_bulk(self, conversations: List[Dict[str, Any]]) -> List[str]:
+        """Store many conversations in one transaction.
+        
+        Node and pair rows from every conversation go out as one bulk upsert
+        per table, so large batches take the COPY path. Any failure rolls back
+        the whole batch.
+        """
+        if not conversations:
+            return []
+        
+        logger.info(f"Storing {len(conversations)} conversations to database")
+        
+        with self.get_connection() as conn:
+            try:
+                with self.get_cursor(conn) as cursor:
+                    conversation_ids = []
+                    node_records = []
+                    pair_records = []
+                    for conversation_data in conversations:
+                        conversation_id = self._insert_conversation_with_cursor(cursor, conversation_data)
+                        conversation_ids.append(conversation_id)
+                        
+                        nodes_data = conversation_data.get('nodes', {})
+                        if nodes_data:
+                            node_records.extend(self._node_records(conversation_id, nodes_data))
+                        
+                        pairs_data = conversation_data.get('pairs', [])
+                        if pairs_data:
+                            pair_records.extend(self._pair_records(conversation_id, pairs_data))
+                    
+                    if node_records:
+                        self._bulk_upsert(cursor, 'carta.nodes', _NODE_COLUMNS, _NODE_CONFLICT,
+                                          node_records, _NODE_TMPL)
+                    if pair_records:
+                        self._bulk_upsert(cursor, 'carta.pairs', _PAIR_COLUMNS, _PAIR_CONFLICT,
+                                          pair_records, _PAIR_TMPL)
+                
+                conn.commit()
+                logger.info(f"Successfully stored {len(conversation_ids)} conversations with {len(node_records)} nodes and {len(pair_records)} pairs")
+                
+                return conversation_ids
+                
+            except Exception as e:
+                logger.error(f"Error storing conversations: {e}")
+                conn.rollback()
+                raise
+    
     def get_conversation_summary(self, conversation_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve conversation summary by ID."""
         query = """
@@ -359,8 +560,10 @@ class DatabaseClient:
             WHERE conversation_id = %s
         """
         
+        from psycopg2.extras import DictCursor
+        
         with self.get_connection() as conn:
-            with self.get_cursor(conn) as cursor:
+            with self.get_cursor(conn, cursor_factory=DictCursor) as cursor:
                 cursor.execute(query, (conversation_id,))
                 result = cursor.fetchone()
                 return dict(result) if result else None 
\ No newline at end of file
@@ -5,6 +5,12 @@ CartaEmbedder class retrieves and returns high-dimensional
 vector embeddings from OpenAI for the parsed conversation trees.
 """
 
-from .embedder import CartaEmbedder
+__all__ = ["CartaEmbedder"]
 
-__all__ = ["CartaEmbedder"]
\ No newline at end of file
+
+def __getattr__(name):
+    """Resolve CartaEmbedder on first access to defer openai/numpy imports."""
+    if name == "CartaEmbedder":
+        from .embedder import CartaEmbedder
+        return CartaEmbedder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,38 +5,279 @@ Retrieves and returns high-dimensional vector embeddings from OpenAI
 for the parsed conversation trees.
 """
 
+import asyncio
 import json
 import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 
+import numpy as np
+import orjson
+
+from .._json import loads
+from .node_embedder import extract_node_text
 from .openai_utils import OpenAIEmbedder
+from .semantic_analyzer import (
+    calculate_parent_child_distances,
+    calculate_sibling_distances,
+    normalize_node_embeddings,
+    paired_distances,
+)
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+_JSON_ERRORS = (json.JSONDecodeError,) + ((ijson.JSONError,) if ijson is not None else ())
+
+# Embedding rows are serialized natively, without a tolist() round-trip
+_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+
+@lru_cache(maxsize=1)
+def _warn_no_streaming() -> None:
+    """Log once per process that parsed files are loaded whole because ijson is missing."""
+    logger.warning("ijson is not installed; parsed files will be loaded into memory whole")
+
+
+def _to_builtin(value: Any) -> Any:
+    """json default hook for the NumPy arrays and scalars orjson serializes natively."""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class _EmbeddingRows:
+    """Float16 embedding rows for the .npy sidecar, appended to a raw file as they arrive.
+
+    Keeping rows on disk instead of in a list lets each conversation's
+    embedding matrix be freed once that conversation is written.
+    """
+
+    def __init__(self, raw_path: Path):
+        self.raw_path = raw_path
+        self.count = 0
+        self.width: Optional[int] = None
+        self._file = open(raw_path, 'wb')
+
+    def append(self, embedding: Any) -> int:
+        """Write one embedding and return its row index."""
+        row = np.asarray(embedding, dtype='<f2')
+        if self.width is None:
+            self.width = row.shape[0]
+        elif row.shape != (self.width,):
+            raise ValueError(f"Embedding of shape {row.shape} does not match width {self.width}")
+
+        self._file.write(row.tobytes())
+        self.count += 1
+        return self.count - 1
+
+    def save(self, npy_path: Path) -> None:
+        """Write the rows appended so far as a (count, width) float16 .npy file."""
+        self._file.close()
+        header = {'descr': '<f2', 'fortran_order': False, 'shape': (self.count, self.width)}
+        with open(npy_path, 'wb') as f, open(self.raw_path, 'rb') as raw:
+            np.lib.format.write_array_header_1_0(f, header)
+            shutil.copyfileobj(raw, f)
+
+    def discard(self) -> None:
+        """Close and remove the raw row file."""
+        self._file.close()
+        with suppress(OSError):
+            self.raw_path.unlink()
+
+
+def _detach_embedding(item: Dict[str, Any], rows: _EmbeddingRows) -> Dict[str, Any]:
+    """Copy a node or pair with its embedding moved into rows and replaced by a row index."""
+    embedding = item.get('embedding')
+    if embedding is None:
+        return item
+
+    detached = {key: value for key, value in item.items() if key != 'embedding'}
+    detached['emb_row_index'] = rows.append(embedding)
+    return detached
+
+
+def _dump_conversation(conversation: Dict[str, Any], rows: Optional[_EmbeddingRows] = None) -> bytes:
+    """Serialize one conversation as an indented list item, dropping in-memory `_` keys.
+
+    When rows is given, embeddings are written there for the .npy sidecar
+    instead of inline; the conversation itself is not modified.
+    """
+    public = {key: value for key, value in conversation.items() if not key.startswith('_')}
+    if rows is not None:
+        if 'nodes' in public:
+            public['nodes'] = {
+                node_id: _detach_embedding(node, rows) for node_id, node in public['nodes'].items()
+            }
+        if 'pairs' in public:
+            public['pairs'] = [_detach_embedding(pair, rows) for pair in public['pairs']]
+    try:
+        dumped = orjson.dumps(public, option=_DUMP_OPTIONS)
+    except orjson.JSONEncodeError:
+        # Lone surrogates in message text are only encodable as json escapes
+        dumped = json.dumps(public, indent=2, default=_to_builtin).encode('ascii')
+    return dumped.replace(b'\n', b'\n  ')
+
+
+def _calculate_ancestry(nodes: Dict[str, Dict[str, Any]], normed: Dict[str, np.ndarray]) -> None:
+    """Write parent, sibling and mainline distances into each node's derived fields."""
+    calculate_parent_child_distances(nodes, None, normed)
+    calculate_sibling_distances(nodes, None, normed)
+
+    # Calculate semantic distance from mainline for branch nodes
+    mainline_nodes = {
+        node_id: node for node_id, node in nodes.items()
+        if node.get('derived', {}).get('is_mainline', False)
+    }
+
+    branch_nodes = {
+        node_id: node for node_id, node in nodes.items()
+        if not node.get('derived', {}).get('is_mainline', False)
+    }
+
+    # Index mainline nodes by turn once; the first node at each turn wins
+    mainline_by_turn = {}
+    for node_id, node in mainline_nodes.items():
+        turn_number = node.get('derived', {}).get('turn_number')
+        if turn_number is not None:
+            mainline_by_turn.setdefault(turn_number, node_id)
+
+    matches = []
+    for branch_id, branch_node in branch_nodes.items():
+        # Find the mainline node at the same turn number if possible
+        turn_number = branch_node.get('derived', {}).get('turn_number')
+        mainline_id = mainline_by_turn.get(turn_number)
+
+        if mainline_id and branch_id in normed and mainline_id in normed:
+            matches.append((branch_id, mainline_id))
+
+    # Calculate all matched distances in one pass
+    for (branch_id, _), distance in zip(matches, paired_distances(matches, normed)):
+        branch_node = nodes[branch_id]
+
+        # Add to derived properties
+        if 'derived' not in branch_node:
+            branch_node['derived'] = {}
+
+        branch_node['derived']['mainline_semantic_distance'] = distance
+
+
+def _semantic_ancestry_worker(nodes: Dict[str, Dict[str, Any]],
+                              normed: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+    """Process-pool entry point; returns derived fields for the caller to merge back."""
+    _calculate_ancestry(nodes, normed)
+    return {node_id: node['derived'] for node_id, node in nodes.items() if 'derived' in node}
+
 
 class CartaEmbedder:
     """Generates and manages embeddings for parsed conversation trees."""
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "text-embedding-3-large"):
+    _embedders: Dict[Tuple[Optional[str], str, Optional[int]], OpenAIEmbedder] = {}
+    _embedders_lock = threading.Lock()
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "text-embedding-3-large",
+                 dimensions: Optional[int] = None):
         """Initialize the embedder.
 
         Args:
             api_key: OpenAI API key. If None, will try to use OPENAI_API_KEY environment variable.
             model: The embedding model to use. Default is text-embedding-3-large.
+            dimensions: Requested embedding dimension for text-embedding-3 models.
         """
-        self.openai_embedder = OpenAIEmbedder(api_key=api_key, model=model)
+        self.openai_embedder = self._shared_embedder(api_key, model, dimensions)
         logger.info(f"Initialized Carta Embedder with model: {model}")
 
-    def process_file(self, file_path: str) -> List[Dict[str, Any]]:
+    @classmethod
+    def _shared_embedder(cls, api_key: Optional[str], model: str,
+                         dimensions: Optional[int]) -> OpenAIEmbedder:
+        """Return the process-wide OpenAIEmbedder for these settings.
+
+        Reusing one instance keeps its HTTP connection pool and embedding
+        cache warm across CartaEmbedder instances.
+        """
+        key = (api_key, model, dimensions)
+        with cls._embedders_lock:
+            embedder = cls._embedders.get(key)
+            if embedder is None:
+                embedder = OpenAIEmbedder(api_key=api_key, model=model, dimensions=dimensions)
+                cls._embedders[key] = embedder
+        return embedder
+
+    def process_file(self, file_path: str, max_concurrent_conversations: int = 4,
+                     ancestry_workers: int = 0) -> Iterator[Dict[str, Any]]:
         """
-        Process a parsed conversation file and generate embeddings.
+        Stream a parsed conversation file, yielding conversations as they are embedded.
 
         Args:
             file_path: Path to the parsed JSON file.
+            max_concurrent_conversations: Conversations embedded at the same time.
+            ancestry_workers: Worker processes for the semantic ancestry pass. With 0
+                the pass runs in-process; process startup only pays off on large files.
+
+        Yields:
+            Conversation data enriched with embeddings, in file order.
+        """
+        if not file_path:
+            logger.error("No file path provided")
+            return
+
+        file_path = Path(file_path)
+        logger.info(f"Processing file: {file_path}")
+
+        # One loop per file keeps the async client and its connections alive across windows
+        loop = asyncio.new_event_loop()
+        # Spawned workers do not inherit locks held by other threads, as forked ones can
+        executor = ProcessPoolExecutor(
+            max_workers=ancestry_workers, mp_context=multiprocessing.get_context('spawn')
+        ) if ancestry_workers > 0 else None
+        ancestry = executor is None
+        try:
+            processed = 0
+            window = []
+            for conversation in self._iter_conversations(file_path):
+                window.append(conversation)
+                if len(window) == max_concurrent_conversations:
+                    enriched = loop.run_until_complete(self._aprocess_window(window, processed, ancestry))
+                    yield from self._apply_ancestry(enriched, executor)
+                    processed += len(window)
+                    window = []
+
+            if window:
+                enriched = loop.run_until_complete(self._aprocess_window(window, processed, ancestry))
+                yield from self._apply_ancestry(enriched, executor)
+                processed += len(window)
+
+            logger.info(f"Completed processing {processed} conversations")
+        finally:
+            try:
+                # The loop's async client and its connection pool must close before the loop does
+                loop.run_until_complete(self.openai_embedder.aclose())
+            finally:
+                loop.close()
+            if executor is not None:
+                executor.shutdown()
+
+    async def aprocess_file(self, file_path: str, max_concurrent_conversations: int = 4) -> List[Dict[str, Any]]:
+        """
+        Process a parsed conversation file, pipelining conversations concurrently.
+
+        Args:
+            file_path: Path to the parsed JSON file.
+            max_concurrent_conversations: Conversations embedded at the same time.
 
         Returns:
-            List of conversation data enriched with embeddings.
+            List of conversation data enriched with embeddings, in file order.
         """
         if not file_path:
             logger.error("No file path provided")
@@ -45,154 +286,259 @@ class CartaEmbedder:
         file_path = Path(file_path)
         logger.info(f"Processing file: {file_path}")
 
-        # Load the parsed data
+        conversations = list(self._iter_conversations(file_path))
+        logger.info(f"Loaded {len(conversations)} conversations from {file_path}")
+
+        # Overlap conversations so one slow round-trip does not stall the rest
+        semaphore = asyncio.Semaphore(max_concurrent_conversations)
+
+        async def _bounded(convo_idx: int, conversation: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                logger.info(f"Processing conversation {convo_idx+1}/{len(conversations)}")
+                return await self._aprocess_conversation(conversation)
+
+        enriched_conversations = await asyncio.gather(
+            *(_bounded(convo_idx, conversation) for convo_idx, conversation in enumerate(conversations))
+        )
+
+        logger.info(f"Completed processing {len(conversations)} conversations")
+        return list(enriched_conversations)
+
+    def _iter_conversations(self, file_path: Path) -> Iterator[Dict[str, Any]]:
+        """Yield conversations from a parsed JSON file, streaming when ijson is available.
+
+        Args:
+            file_path: Path to the parsed JSON file.
+
+        Yields:
+            Parsed conversation data, one conversation at a time.
+
+        Raises:
+            Errors that occur after the first conversation was yielded, so a
+            truncated or corrupt file is never mistaken for a complete one.
+        """
+        yielded = False
         try:
-            with open(file_path, 'r') as f:
-                conversations = json.load(f)
-            logger.info(f"Loaded {len(conversations)} conversations from {file_path}")
+            with open(file_path, 'rb') as f:
+                if ijson is not None:
+                    conversations = ijson.items(f, 'item', use_float=True)
+                else:
+                    _warn_no_streaming()
+                    conversations = loads(f.read())
+                for conversation in conversations:
+                    yielded = True
+                    yield conversation
         except FileNotFoundError:
             logger.error(f"File not found: {file_path}")
-            return []
-        except json.JSONDecodeError:
+        except _JSON_ERRORS:
             logger.error(f"Invalid JSON in file: {file_path}")
-            return []
+            if yielded:
+                raise
         except Exception as e:
             logger.error(f"Error loading file: {e}")
-            return []
+            if yielded:
+                raise
 
-        # Process each conversation
-        enriched_conversations = []
-        for convo_idx, conversation in enumerate(conversations):
-            logger.info(f"Processing conversation {convo_idx+1}/{len(conversations)}")
-            enriched_conversation = self.process_conversation(conversation)
-            enriched_conversations.append(enriched_conversation)
+    async def _aprocess_window(self, conversations: List[Dict[str, Any]], offset: int,
+                               ancestry: bool = True) -> List[Dict[str, Any]]:
+        """Embed a window of conversations with pooled API batches.
 
-        logger.info(f"Completed processing {len(conversations)} conversations")
-        return enriched_conversations
+        Args:
+            conversations: Conversations read from the stream.
+            offset: Number of conversations processed before this window.
+            ancestry: Run the semantic ancestry pass in-process.
+
+        Returns:
+            Enriched conversations in input order.
+        """
+        for convo_idx in range(len(conversations)):
+            logger.info(f"Processing conversation {offset + convo_idx + 1}")
+        return await self._aprocess_conversations(conversations, ancestry)
+
+    def _apply_ancestry(self, conversations: List[Dict[str, Any]],
+                        executor: Optional[ProcessPoolExecutor]) -> List[Dict[str, Any]]:
+        """Run the semantic ancestry pass for a window on the process pool, if any.
+
+        Args:
+            conversations: Embedded conversations from _aprocess_window.
+            executor: Process pool, or None when ancestry already ran in-process.
+
+        Returns:
+            The same conversations with derived metrics merged in.
+        """
+        if executor is None:
+            return conversations
+
+        with_nodes = [conversation for conversation in conversations if 'nodes' in conversation]
+        payloads = [self._ancestry_payload(conversation) for conversation in with_nodes]
+        results = executor.map(
+            _semantic_ancestry_worker,
+            [slim_nodes for slim_nodes, _ in payloads],
+            [normed for _, normed in payloads]
+        )
+
+        for conversation, updates in zip(with_nodes, results):
+            nodes = conversation['nodes']
+            for node_id, derived in updates.items():
+                nodes[node_id].setdefault('derived', {}).update(derived)
+
+        return conversations
 
     def process_conversation(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
         """Process a single conversation, generating embeddings for nodes and pairs.
 
+        The top-level conversation dict is copied first; use
+        process_conversation_inplace when the caller no longer needs it.
+
         Args:
             conversation: Parsed conversation data.
 
         Returns:
             Conversation data enriched with embeddings.
         """
-        # Create a copy to avoid modifying the original
-        conversation = conversation.copy()
+        return self.process_conversation_inplace(conversation.copy())
 
-        # Process nodes
-        if 'nodes' in conversation:
-            logger.info(f"Processing {len(conversation['nodes'])} nodes")
-            self._process_nodes(conversation['nodes'])
+    def process_conversation_inplace(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
+        """Process a single conversation, enriching the given dict directly.
 
-        # Process pairs
-        if 'pairs' in conversation:
-            logger.info(f"Processing {len(conversation['pairs'])} pairs")
-            self._process_pairs(conversation)
+        Args:
+            conversation: Parsed conversation data; modified in place.
 
-        # Calculate additional semantic metrics
-        if 'nodes' in conversation:
-            logger.info("Calculating semantic ancestry metrics")
-            self._calculate_semantic_ancestry(conversation)
+        Returns:
+            The same conversation, enriched with embeddings.
+        """
+        return self.openai_embedder.run(self._aprocess_conversation(conversation))
 
-        return conversation
+    async def _aprocess_conversation(self, conversation: Dict[str, Any], ancestry: bool = True) -> Dict[str, Any]:
+        """Async body of process_conversation; enriches the conversation in place.
 
-    def _process_nodes(self, nodes: Dict[str, Dict[str, Any]]) -> None:
-        """Generate embeddings for all nodes in a conversation.
+        Internal callers pass conversations freshly read from disk, so no copy is made.
 
         Args:
-            nodes: Dictionary of nodes from the conversation.
+            conversation: Parsed conversation data.
+            ancestry: Calculate semantic ancestry metrics after embedding.
+
+        Returns:
+            The same conversation, enriched with embeddings.
         """
-        # Extract text content from nodes for batch processing
-        node_texts = {}
-        for node_id, node in nodes.items():
-            text = self._extract_node_text(node)
-            if text:
-                node_texts[node_id] = text
+        return (await self._aprocess_conversations([conversation], ancestry))[0]
+
+    def process_conversations(self, conversations: List[Dict[str, Any]],
+                              batch_size: int = 100) -> List[Dict[str, Any]]:
+        """Process several conversations with one pooled set of embedding requests.
 
-        # Generate embeddings in batches for efficiency
-        logger.info(f"Generating embeddings for {len(node_texts)} nodes")
-        node_ids = list(node_texts.keys())
-        texts = [node_texts[node_id] for node_id in node_ids]
+        Texts from every conversation are collected first, so API batches are
+        filled across conversation boundaries instead of per conversation.
 
-        embeddings = self.openai_embedder.get_embeddings_batch(texts)
+        Args:
+            conversations: Parsed conversation data; modified in place.
+            batch_size: Maximum number of texts per API call.
 
-        # Attach embeddings back to corresponding nodes
-        for idx, node_id in enumerate(node_ids):
-            nodes[node_id]['embedding'] = embeddings[idx]
+        Returns:
+            The same conversations, enriched with embeddings, in input order.
+        """
+        return self.openai_embedder.run(self._aprocess_conversations(conversations, batch_size=batch_size))
 
-    def _extract_node_text(self, node: Dict[str, Any]) -> Optional[str]:
-        """Extract the text content from a node.
+    async def _aprocess_conversations(self, conversations: List[Dict[str, Any]], ancestry: bool = True,
+                                      batch_size: int = 100) -> List[Dict[str, Any]]:
+        """Embed conversations in place through a single batched dispatch.
 
         Args:
-            node: Node data.
+            conversations: Parsed conversation data.
+            ancestry: Calculate semantic ancestry metrics after embedding.
+            batch_size: Maximum number of texts per API call.
 
         Returns:
-            Extracted text or None if no valid text found.
+            The same conversations, enriched with embeddings.
         """
-        if not node or 'message' not in node:
-            return None
+        # Collect node and pair texts of every conversation, remembering each one's row span
+        jobs = []
+        spans = []
+        for conversation in conversations:
+            start = len(jobs)
+            if 'nodes' in conversation:
+                logger.info(f"Processing {len(conversation['nodes'])} nodes")
+                jobs.extend(self._node_jobs(conversation['nodes']))
+
+            if 'pairs' in conversation:
+                logger.info(f"Processing {len(conversation['pairs'])} pairs")
+                jobs.extend(self._pair_jobs(conversation))
+            spans.append((start, len(jobs)))
+
+        if jobs:
+            embeddings = await self.openai_embedder._aget_embeddings_batch(
+                [text for _, _, _, text in jobs], batch_size
+            )
+
+            # Attach row views back to their nodes and pairs; the matrix stays the single copy
+            for (_, _, target, _), embedding in zip(jobs, embeddings):
+                target['embedding'] = embedding
+
+            for conversation, (start, end) in zip(conversations, spans):
+                if start == end:
+                    continue
+                conversation['_embedding_matrix'] = embeddings[start:end]
+                conversation['_row_of'] = {
+                    key: row for row, (kind, key, _, _) in enumerate(jobs[start:end]) if kind == "node"
+                }
 
-        message = node.get('message', {})
+        # Calculate additional semantic metrics
+        if ancestry:
+            for conversation in conversations:
+                if 'nodes' in conversation:
+                    logger.info("Calculating semantic ancestry metrics")
+                    self._calculate_semantic_ancestry(conversation)
 
-        # Handle different ChatGPT message content structures
-        if 'content' in message:
-            content = message['content']
+        return conversations
 
-            # Handle simple text content
-            if isinstance(content, dict) and 'text' in content:
-                return content['text']
+    def _node_jobs(self, nodes: Dict[str, Dict[str, Any]]) -> List[Tuple[str, Any, Dict[str, Any], str]]:
+        """Collect embedding jobs for all nodes in a conversation.
 
-            # Handle multimodal content (text + images/files)
-            if isinstance(content, dict) and 'parts' in content:
-                parts = content.get('parts', [])
-                texts = []
-                for part in parts:
-                    if isinstance(part, dict) and 'text' in part:
-                        texts.append(part['text'])
-                return " ".join(texts) if texts else None
+        Args:
+            nodes: Dictionary of nodes from the conversation.
+
+        Returns:
+            ("node", node_id, node, text) tuples for every node with text content.
+        """
+        jobs = []
+        for node_id, node in nodes.items():
+            text = extract_node_text(node)
+            if text:
+                jobs.append(("node", node_id, node, text))
 
-        return None
+        logger.info(f"Generating embeddings for {len(jobs)} nodes")
+        return jobs
 
-    def _process_pairs(self, conversation: Dict[str, Any]) -> None:
-        """Generate embeddings for all prompt-response pairs in a conversation.
+    def _pair_jobs(self, conversation: Dict[str, Any]) -> List[Tuple[str, Any, Dict[str, Any], str]]:
+        """Collect embedding jobs for all prompt-response pairs in a conversation.
 
         Args:
             conversation: Conversation data containing nodes and pairs.
+
+        Returns:
+            ("pair", pair_index, pair, text) tuples; pairs missing text get an empty string.
         """
         pairs = conversation.get('pairs', [])
         nodes = conversation.get('nodes', {})
 
-        # Extract texts for all pairs
-        pair_texts = []
-        valid_pairs = []
-
-        for pair in pairs:
+        jobs = []
+        for pair_index, pair in enumerate(pairs):
             prompt_id = pair.get('prompt_id')
             response_id = pair.get('response_id')
 
             if prompt_id and response_id and prompt_id in nodes and response_id in nodes:
-                prompt_text = self._extract_node_text(nodes[prompt_id])
-                response_text = self._extract_node_text(nodes[response_id])
+                prompt_text = extract_node_text(nodes[prompt_id])
+                response_text = extract_node_text(nodes[response_id])
 
                 if prompt_text and response_text:
                     formatted_text = self.openai_embedder.format_pair_for_embedding(prompt_text, response_text)
-                    pair_texts.append(formatted_text)
-                    valid_pairs.append(pair)
+                    jobs.append(("pair", pair_index, pair, formatted_text))
                 else:
-                    pair_texts.append("")
-                    valid_pairs.append(pair)
-
-        # Generate embeddings for valid pairs
-        if valid_pairs:
-            logger.info(f"Generating embeddings for {len(valid_pairs)} pairs")
-            embeddings = self.openai_embedder.get_embeddings_batch(pair_texts)
+                    jobs.append(("pair", pair_index, pair, ""))
 
-            # Add embeddings back to pairs
-            for idx, pair in enumerate(valid_pairs):
-                pair['embedding'] = embeddings[idx]
+        if jobs:
+            logger.info(f"Generating embeddings for {len(jobs)} pairs")
+        return jobs
 
     def _calculate_semantic_ancestry(self, conversation: Dict[str, Any]) -> None:
         """Calculate semantic ancestry metrics for the conversation.
@@ -202,112 +548,108 @@ class CartaEmbedder:
         """
         nodes = conversation.get('nodes', {})
 
-        # Calculate semantic distances between parent-child nodes
-        for node_id, node in nodes.items():
-            parent_id = node.get('parent_id')
-            if parent_id and parent_id in nodes:
-                parent_embedding = nodes[parent_id].get('embedding')
-                node_embedding = node.get('embedding')
+        # Normalize once; every distance below is then a single dot product
+        normed = normalize_node_embeddings(
+            nodes, self.openai_embedder,
+            conversation.get('_embedding_matrix'), conversation.get('_row_of')
+        )
 
-                if parent_embedding and node_embedding:
-                    distance = self.openai_embedder.calculate_cosine_distance(
-                        parent_embedding, node_embedding
-                    )
+        _calculate_ancestry(nodes, normed)
 
-                    # Add to derived properties
-                    if 'derived' not in node:
-                        node['derived'] = {}
+    def _ancestry_payload(self, conversation: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, np.ndarray]]:
+        """Build the picklable input for _semantic_ancestry_worker.
 
-                    node['derived']['semantic_distance_from_parent'] = distance
+        Only parent links and derived fields travel to the worker, plus the
+        float16 normalized rows; full node payloads and raw embeddings stay here.
 
-        # Calculate semantic distances between siblings
-        for node_id, node in nodes.items():
-            parent_id = node.get('parent_id')
-            if parent_id and parent_id in nodes:
-                siblings = [
-                    sib_id for sib_id, sib in nodes.items()
-                    if sib.get('parent_id') == parent_id and sib_id != node_id
-                ]
-
-                if siblings and 'embedding' in node:
-                    # Calculate average distance to siblings
-                    sibling_distances = []
-                    for sib_id in siblings:
-                        if 'embedding' in nodes[sib_id]:
-                            distance = self.openai_embedder.calculate_cosine_distance(
-                                node['embedding'], nodes[sib_id]['embedding']
-                            )
-                            sibling_distances.append(distance)
-
-                    if sibling_distances:
-                        avg_sibling_distance = sum(sibling_distances) / len(sibling_distances)
-
-                        # Add to derived properties
-                        if 'derived' not in node:
-                            node['derived'] = {}
-
-                        node['derived']['avg_sibling_semantic_distance'] = avg_sibling_distance
-
-        # Calculate semantic distance from mainline for branch nodes
-        mainline_nodes = {
-            node_id: node for node_id, node in nodes.items()
-            if node.get('derived', {}).get('is_mainline', False)
-        }
+        Args:
+            conversation: Conversation data with nodes and their embeddings.
 
-        branch_nodes = {
-            node_id: node for node_id, node in nodes.items()
-            if not node.get('derived', {}).get('is_mainline', False)
+        Returns:
+            Slim node mapping and normalized embeddings keyed by node ID.
+        """
+        nodes = conversation.get('nodes', {})
+        normed = normalize_node_embeddings(
+            nodes, self.openai_embedder,
+            conversation.get('_embedding_matrix'), conversation.get('_row_of')
+        )
+        slim_nodes = {
+            node_id: {'parent_id': node.get('parent_id'), 'derived': dict(node.get('derived', {}))}
+            for node_id, node in nodes.items()
         }
+        return slim_nodes, normed
 
-        for branch_id, branch_node in branch_nodes.items():
-            # Find the mainline node at the same turn number if possible
-            turn_number = branch_node.get('derived', {}).get('turn_number')
-            mainline_at_turn = None
-
-            if turn_number is not None:
-                mainline_at_turn = next(
-                    (node for node_id, node in mainline_nodes.items()
-                     if node.get('derived', {}).get('turn_number') == turn_number),
-                    None
-                )
-
-            # Calculate distance if we found a matching mainline node
-            if mainline_at_turn and 'embedding' in branch_node and 'embedding' in mainline_at_turn:
-                distance = self.openai_embedder.calculate_cosine_distance(
-                    branch_node['embedding'], mainline_at_turn['embedding']
-                )
-
-                # Add to derived properties
-                if 'derived' not in branch_node:
-                    branch_node['derived'] = {}
-
-                branch_node['derived']['mainline_semantic_distance'] = distance
-
-    def save_to_json(self, data: List[Dict[str, Any]], output_filename: str) -> str:
+    def save_to_json(self, data: Iterable[Dict[str, Any]], output_filename: str,
+                     embeddings_sidecar: bool = True) -> str:
         """Save the enriched conversation data to a JSON file.
 
+        Conversations are written one at a time, so a generator from
+        process_file is never held in memory as a whole. By default each
+        node and pair embedding is replaced with an `emb_row_index` into a
+        float16 matrix saved next to the JSON as `<output>.embeddings.npy`.
+
         Args:
-            data: List of enriched conversation data.
+            data: Enriched conversation data, as a list or an iterator.
             output_filename: Filename for the output file.
+            embeddings_sidecar: Write embeddings to the .npy sidecar instead of inline.
 
         Returns:
             Path to the saved file.
         """
-        if not data:
+        conversations = iter(data)
+        first = next(conversations, None)
+        if first is None:
             logger.warning("No data to save")
             return ""
 
         # Convert string path to Path object
         output_path = Path(output_filename)
+        sidecar_path = output_path.with_suffix('.embeddings.npy')
+
+        # Write next to the targets and rename into place only once everything succeeded
+        tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+        tmp_sidecar_path = sidecar_path.with_name(f"{sidecar_path.name}.{os.getpid()}.tmp")
+        raw_rows_path = sidecar_path.with_name(f"{sidecar_path.name}.{os.getpid()}.rows.tmp")
 
+        rows = None
+        fetching = False
         try:
             # Ensure parent directory exists
             output_path.parent.mkdir(parents=True, exist_ok=True)
-
-            with open(output_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            if embeddings_sidecar:
+                rows = _EmbeddingRows(raw_rows_path)
+
+            # Same layout as json.dump(data, f, indent=2), written incrementally
+            with open(tmp_path, 'wb') as f:
+                f.write(b'[\n  ')
+                f.write(_dump_conversation(first, rows))
+                fetching = True
+                for conversation in conversations:
+                    fetching = False
+                    f.write(b',\n  ')
+                    f.write(_dump_conversation(conversation, rows))
+                    fetching = True
+                fetching = False
+                f.write(b'\n]')
+
+            if rows is not None and rows.count:
+                rows.save(tmp_sidecar_path)
+                os.replace(tmp_sidecar_path, sidecar_path)
+                logger.info(f"Saved {rows.count} embeddings to {sidecar_path}")
+
+            os.replace(tmp_path, output_path)
             logger.info(f"Saved enriched data to {output_path}")
             return str(output_path)
         except Exception as e:
+            for leftover in (tmp_path, tmp_sidecar_path):
+                with suppress(OSError):
+                    leftover.unlink()
+
+            # Failures while producing conversations belong to the caller, not to saving
+            if fetching:
+                raise
             logger.error(f"Error saving data: {e}")
             return ""
+        finally:
+            if rows is not None:
+                rows.discard()
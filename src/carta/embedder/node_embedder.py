@@ -39,6 +39,8 @@ def process_nodes(nodes: Dict[str, Dict[str, Any]], embedder) -> None:
 def extract_node_text(node: Dict[str, Any]) -> Optional[str]:
     """Extract the text content from a node.
 
+    Canonical implementation shared by CartaEmbedder and the pair embedder.
+
     Args:
         node: Node data.
 
@@ -49,28 +51,27 @@ def extract_node_text(node: Dict[str, Any]) -> Optional[str]:
         return None
 
     # If the node already has extracted text, use that
-    if 'text' in node and node['text']:
-        return node['text']
-
-    message = node.get('message', {})
-
-    # Handle different content structures
-    if 'content' in message:
-        content = message['content']
-
-        # Handle text content
-        if isinstance(content, dict) and 'text' in content:
-            return content['text']
-
-        # Handle multimodal content
-        if isinstance(content, dict) and 'parts' in content:
-            parts = content.get('parts', [])
-            texts = []
-            for part in parts:
-                if isinstance(part, str):
-                    texts.append(part)
-                elif isinstance(part, dict) and 'text' in part:
-                    texts.append(part['text'])
-            return " ".join(texts) if texts else None
-
-    return None
+    text = node.get('text')
+    if text:
+        return text
+
+    content = (node['message'] or {}).get('content')
+    if not isinstance(content, dict):
+        return None
+
+    # Handle text content
+    if 'text' in content:
+        return content['text']
+
+    # Handle multimodal content; parts are plain strings or {'text': ...} dicts
+    parts = content.get('parts')
+    if not parts:
+        return None
+
+    texts = []
+    for part in parts:
+        if isinstance(part, str):
+            texts.append(part)
+        elif isinstance(part, dict) and 'text' in part:
+            texts.append(part['text'])
+    return " ".join(texts) if texts else None
@@ -5,25 +5,68 @@ This module provides clean abstractions for embedding generation and semantic
 distance calculations, supporting the field-theoretic analysis of conversation trees.
 """
 
+import asyncio
+import hashlib
+import importlib.util
 import os
 import logging
-import time
-from typing import List, Optional
+import random
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Awaitable, Dict, List, Optional, Tuple, TypeVar
+import httpx
 import numpy as np
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI, RateLimitError
+
+try:
+    from diskcache import Index
+except ImportError:
+    Index = None
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Keep-alive pool sized for max_concurrency batches plus headroom
+_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+_HTTP_TIMEOUT = 60.0
+
+# In-memory embedding cache entries; about 32 MB of float32 rows at 2000 dims
+_CACHE_SIZE = 4096
+
+# HTTP/2 multiplexes concurrent batches over one connection when h2 is installed
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+def _cosine_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine distance between two L2-normalized vectors, accumulated in float32."""
+    return 1.0 - float(a.astype(np.float32, copy=False) @ b.astype(np.float32, copy=False))
+
 
 class OpenAIEmbedder:
     """Utility class for generating embeddings using OpenAI's API."""
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "text-embedding-3-large"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "text-embedding-3-large",
+                 max_concurrency: int = 8, max_retries: int = 5, dimensions: Optional[int] = None,
+                 http_client: Optional[httpx.Client] = None, cache_dir: Optional[str] = None,
+                 cache_size: int = _CACHE_SIZE):
         """Initialize the OpenAI embedder.
 
         Args:
             api_key: OpenAI API key. If None, will try to use OPENAI_API_KEY environment variable.
             model: The embedding model to use. Default is text-embedding-3-large.
+            max_concurrency: Maximum number of batch requests in flight at once.
+            max_retries: Attempts per batch when the API responds with a rate limit; at least 1.
+            dimensions: Output dimension for text-embedding-3 models, which the API
+                truncates server-side. Defaults to 2000 for text-embedding-3-large
+                to match the VECTOR(2000) columns.
+            http_client: Pre-built httpx client for the sync API client. If None, a
+                pooled keep-alive client is created.
+            cache_dir: Directory for the persistent embedding cache, which requires
+                diskcache. Defaults to CARTA_EMBEDDING_CACHE_DIR; with neither set,
+                embeddings are only cached in memory.
+            cache_size: Maximum number of embeddings kept in the in-memory LRU cache.
         """
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
@@ -32,12 +75,131 @@ class OpenAIEmbedder:
                 "or pass api_key parameter."
             )
 
+        if max_retries < 1:
+            raise ValueError("max_retries must be at least 1")
+
         self.model = model
-        self.client = OpenAI(api_key=self.api_key)
-        self.dimension = 2000 if model == "text-embedding-3-large" else 1536
+        self.client = OpenAI(
+            api_key=self.api_key,
+            http_client=http_client or httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+        )
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.dimension = dimensions or (2000 if model == "text-embedding-3-large" else 1536)
+
+        # Only the text-embedding-3 family accepts a requested output dimension
+        self._request_options = (
+            {"dimensions": self.dimension} if model.startswith("text-embedding-3") else {}
+        )
+
+        # Recently fetched embeddings keyed by _cache_key, least recently used first
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_size = cache_size
+        # The embedder is shared across embed_cli worker threads
+        self._cache_lock = threading.Lock()
+
+        # Embeddings from earlier runs, stored as raw float32 bytes
+        self._disk = None
+        cache_dir = cache_dir or os.environ.get("CARTA_EMBEDDING_CACHE_DIR")
+        if cache_dir:
+            if Index is None:
+                logger.warning("diskcache is not installed; embeddings will not be cached on disk")
+            else:
+                self._disk = Index(os.path.expanduser(cache_dir))
+
+        # Async clients and the concurrency budget are bound to the event loop they were created on
+        self._loop_state = weakref.WeakKeyDictionary()
+        self._loop_state_lock = threading.Lock()
 
         logger.info(f"Initialized OpenAI embedder with model: {model}")
 
+    def _cache_key(self, text: str) -> bytes:
+        """Content hash identifying a text's embedding under the current model and dimension."""
+        return hashlib.blake2b(
+            text.encode('utf-8'), digest_size=16, key=f"{self.model}|{self.dimension}".encode('utf-8')
+        ).digest()
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Collect cached embeddings for keys from memory, then from disk."""
+        found = {}
+        for key in keys:
+            if key in found:
+                continue
+            with self._cache_lock:
+                row = self._cache.get(key)
+                if row is not None:
+                    self._cache.move_to_end(key)
+            if row is not None:
+                found[key] = row
+            elif self._disk is not None:
+                data = self._disk.get(key)
+                if data is not None:
+                    found[key] = np.frombuffer(data, dtype=np.float32)
+                    self._remember(key, found[key])
+        return found
+
+    def _remember(self, key: bytes, row: np.ndarray) -> None:
+        """Add an embedding to the in-memory cache, evicting the least recently used."""
+        # A copy, so a cached row does not keep its whole response batch alive
+        row = row.copy()
+        with self._cache_lock:
+            self._cache[key] = row
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _save_to_disk(self, keys: List[bytes], embeddings: np.ndarray) -> None:
+        """Persist freshly fetched embeddings in one transaction."""
+        if self._disk is None:
+            return
+
+        with self._disk.transact():
+            for key, embedding in zip(keys, embeddings):
+                self._disk[key] = embedding.tobytes()
+
+    def _async_state(self) -> Tuple[AsyncOpenAI, asyncio.Semaphore]:
+        """Return the async client and shared request semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._loop_state_lock:
+            state = self._loop_state.get(loop)
+            if state is None:
+                # _call_with_retry owns rate-limit backoff, so the SDK must not retry as well
+                client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    max_retries=0,
+                    http_client=httpx.AsyncClient(
+                        http2=_HTTP2, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT
+                    )
+                )
+                state = (client, asyncio.Semaphore(self.max_concurrency))
+                self._loop_state[loop] = state
+        return state
+
+    async def aclose(self) -> None:
+        """Close the async client bound to the running event loop, if one was created."""
+        loop = asyncio.get_running_loop()
+        with self._loop_state_lock:
+            state = self._loop_state.pop(loop, None)
+        if state is not None:
+            await state[0].close()
+
+    def run(self, coro: Awaitable[T]) -> T:
+        """Run a coroutine on a new event loop, closing that loop's async client before the loop ends.
+
+        Args:
+            coro: Coroutine that may issue embedding requests.
+
+        Returns:
+            The coroutine's result.
+        """
+        async def _main() -> T:
+            try:
+                return await coro
+            finally:
+                await self.aclose()
+
+        return asyncio.run(_main())
+
     def get_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single text.
 
@@ -54,7 +216,8 @@ class OpenAIEmbedder:
         try:
             response = self.client.embeddings.create(
                 model=self.model,
-                input=text
+                input=text,
+                **self._request_options
             )
             embedding = response.data[0].embedding
             return embedding
@@ -62,60 +225,120 @@ class OpenAIEmbedder:
             logger.error(f"Error generating embedding: {e}")
             raise
 
-    def get_embeddings_batch(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+    def get_embeddings_batch(self, texts: List[str], batch_size: int = 100) -> np.ndarray:
         """Generate embeddings for a batch of texts efficiently.
 
+        Synchronous wrapper around _aget_embeddings_batch for existing callers.
+
         Args:
             texts: List of texts to embed.
             batch_size: Maximum number of texts to process in a single API call.
 
         Returns:
-            List of embeddings (each is a list of float values).
+            Float32 array of shape (len(texts), D), one row per text.
+        """
+        return self.run(self._aget_embeddings_batch(texts, batch_size))
+
+    async def _aget_embeddings_batch(self, texts: List[str], batch_size: int = 100) -> np.ndarray:
+        """Generate embeddings with up to max_concurrency batch requests in flight.
+
+        Args:
+            texts: List of texts to embed.
+            batch_size: Maximum number of texts to process in a single API call.
+
+        Returns:
+            Float32 array of shape (len(texts), D) in the same order as texts.
         """
         if not texts:
             logger.warning("Empty list provided for batch embedding.")
-            return []
+            return np.zeros((0, self.dimension), dtype=np.float32)
 
         # Filter out empty texts
         valid_texts = [text for text in texts if text and text.strip()]
-        empty_indices = [i for i, text in enumerate(texts) if not text or not text.strip()]
 
-        all_embeddings = []
-        for i in range(0, len(valid_texts), batch_size):
-            batch = valid_texts[i:i+batch_size]
+        # Send each distinct uncached text to the API once
+        keys = [self._cache_key(text) for text in valid_texts]
+        # Held for the whole call, so rows evicted from the LRU mid-call are still returned
+        found = self._lookup(keys)
+        missing = {}
+        for key, text in zip(keys, valid_texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        # Length-sorted batches keep short and long inputs from sharing a request;
+        # results are keyed by content hash, so no scatter back is needed
+        ordered = sorted(missing.items(), key=lambda item: len(item[1]))
+        missing_keys = [key for key, _ in ordered]
+        missing_texts = [text for _, text in ordered]
+        if len(missing_texts) < len(valid_texts):
+            logger.info(f"Embedding cache served {len(valid_texts) - len(missing_texts)} of {len(valid_texts)} texts")
+
+        batches = [missing_texts[i:i+batch_size] for i in range(0, len(missing_texts), batch_size)]
+        # Concurrent callers on the same loop share one in-flight budget
+        client, semaphore = self._async_state()
+
+        async def _sem_call(batch: List[str], idx: int) -> Optional[np.ndarray]:
+            async with semaphore:
+                try:
+                    logger.info(f"Processing batch {idx + 1}/{len(batches)}")
+                    return await self._call_with_retry(client, batch)
+                except Exception as e:
+                    logger.error(f"Error in batch {idx + 1}: {e}")
+                    return None
+
+        # gather preserves submission order, so batches reassemble in place
+        batch_results = await asyncio.gather(
+            *(_sem_call(batch, idx) for idx, batch in enumerate(batches))
+        )
+
+        for idx, batch_embeddings in enumerate(batch_results):
+            # Failed batches are not cached, so a later call can retry them
+            if batch_embeddings is not None:
+                batch_keys = missing_keys[idx * batch_size:(idx + 1) * batch_size]
+                for key, row in zip(batch_keys, batch_embeddings):
+                    found[key] = row
+                    self._remember(key, row)
+                self._save_to_disk(batch_keys, batch_embeddings)
+
+        # Rows for empty texts and failed batches stay zero as a fallback
+        cached = [found.get(key) for key in keys]
+        width = next((row.shape[0] for row in cached if row is not None), self.dimension)
+        result = np.zeros((len(texts), width), dtype=np.float32)
+        valid_positions = [i for i, text in enumerate(texts) if text and text.strip()]
+        for i, row in zip(valid_positions, cached):
+            if row is not None:
+                result[i] = row
+
+        return result
+
+    async def _call_with_retry(self, client: AsyncOpenAI, batch: List[str]) -> np.ndarray:
+        """Request embeddings for one batch, backing off with jitter on rate limits.
+
+        Args:
+            client: Async client bound to the running event loop.
+            batch: Texts for a single API call.
 
+        Returns:
+            Float32 array of embeddings for the batch in input order.
+        """
+        for attempt in range(self.max_retries):
             try:
-                logger.info(f"Processing batch {i//batch_size + 1}/{(len(valid_texts) + batch_size - 1)//batch_size}")
-                response = self.client.embeddings.create(
+                response = await client.embeddings.create(
                     model=self.model,
-                    input=batch
+                    input=batch,
+                    **self._request_options
                 )
-
                 # Sort by index as the API might not return in the same order
-                batch_embeddings = [data.embedding for data in sorted(response.data, key=lambda x: x.index)]
-                all_embeddings.extend(batch_embeddings)
-
-                # Rate limiting: sleep to avoid hitting API limits
-                if i + batch_size < len(valid_texts):
-                    time.sleep(0.5)
-
-            except Exception as e:
-                logger.error(f"Error in batch {i//batch_size + 1}: {e}")
-                # Insert zero vectors for this batch as fallback
-                zero_vectors = [[0.0] * self.dimension for _ in range(len(batch))]
-                all_embeddings.extend(zero_vectors)
-
-        # Reinsert zero vectors for empty texts
-        result = []
-        valid_idx = 0
-        for i in range(len(texts)):
-            if i in empty_indices:
-                result.append([0.0] * self.dimension)
-            else:
-                result.append(all_embeddings[valid_idx])
-                valid_idx += 1
-
-        return result
+                return np.asarray(
+                    [data.embedding for data in sorted(response.data, key=lambda x: x.index)],
+                    dtype=np.float32
+                )
+            except RateLimitError:
+                if attempt == self.max_retries - 1:
+                    raise
+                # Full jitter keeps concurrent batches from retrying in lockstep
+                delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+                logger.warning(f"Rate limited, retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
 
     def format_pair_for_embedding(self, prompt_text: str, response_text: str) -> str:
         """Format a prompt-response pair for embedding with clear semantic boundaries.
@@ -130,6 +353,35 @@ class OpenAIEmbedder:
         formatted_text = f"|Prompt from user:\n---\n{prompt_text}\n\n|Response from assistant:\n---\n{response_text}"
         return formatted_text
 
+    def normalize_embeddings(self, embeddings) -> np.ndarray:
+        """L2-normalize a stack of embeddings row by row.
+
+        Args:
+            embeddings: Embedding vectors of equal dimension, as lists or an array.
+
+        Returns:
+            Float16 array of shape (N, D) with unit-length rows; zero vectors stay zero.
+            Unit-length components keep cosine error near 1e-3 at half the memory of
+            float32; upcast with astype(np.float32, copy=False) before matmuls.
+        """
+        matrix = np.array(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix.astype(np.float16)
+
+    def cosine_distance_normed(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
+        """Calculate cosine distance between two L2-normalized embeddings.
+
+        Args:
+            embedding1: First unit-length embedding vector.
+            embedding2: Second unit-length embedding vector.
+
+        Returns:
+            Cosine distance score between 0 and 2.
+        """
+        return _cosine_distance(embedding1, embedding2)
+
     def calculate_cosine_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """Calculate cosine similarity between two embeddings.
 
@@ -140,12 +392,13 @@ class OpenAIEmbedder:
         Returns:
             Cosine similarity score between 0 and 1.
         """
-        if not embedding1 or not embedding2:
+        # len() rather than truthiness so ndarray rows are accepted
+        if embedding1 is None or embedding2 is None or len(embedding1) == 0 or len(embedding2) == 0:
             return 0.0
 
-        # Convert to numpy arrays
-        vec1 = np.array(embedding1)
-        vec2 = np.array(embedding2)
+        # Convert to numpy arrays; arrays pass through without a copy
+        vec1 = np.asarray(embedding1)
+        vec2 = np.asarray(embedding2)
 
         # Calculate cosine similarity
         similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
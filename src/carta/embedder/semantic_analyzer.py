@@ -1,7 +1,10 @@
 """Semantic relationship analysis for embedded conversation nodes."""
 
 import logging
-from typing import Dict, Any
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -9,61 +12,101 @@ logger = logging.getLogger(__name__)
 def calculate_semantic_ancestry(conversation: Dict[str, Any], embedder) -> None:
     """Calculate semantic distance metrics for conversation nodes."""
     nodes = conversation.get('nodes', {})
+    normed = normalize_node_embeddings(nodes, embedder)
+
+    calculate_parent_child_distances(nodes, embedder, normed)
+    calculate_sibling_distances(nodes, embedder, normed)
+    calculate_branch_mainline_distances(nodes, embedder, normed)
+
+
+def normalize_node_embeddings(nodes: Dict[str, Dict[str, Any]], embedder,
+                              matrix: Optional[np.ndarray] = None,
+                              row_of: Optional[Dict[str, int]] = None) -> Dict[str, np.ndarray]:
+    """Map node IDs to their L2-normalized embeddings, computed once per conversation.
+
+    When the conversation's embedding matrix and row index are given, rows are
+    taken from it directly instead of restacking per-node embeddings.
+    """
+    if matrix is not None and row_of is not None:
+        node_ids = [node_id for node_id in row_of if node_id in nodes]
+        rows = matrix[[row_of[node_id] for node_id in node_ids]]
+    else:
+        node_ids = [node_id for node_id, node in nodes.items() if node.get('embedding') is not None]
+        rows = [nodes[node_id]['embedding'] for node_id in node_ids]
+
+    if not node_ids:
+        return {}
+
+    return dict(zip(node_ids, embedder.normalize_embeddings(rows)))
 
-    calculate_parent_child_distances(nodes, embedder)
-    calculate_sibling_distances(nodes, embedder)
-    calculate_branch_mainline_distances(nodes, embedder)
 
+def paired_distances(pairs: List[Tuple[str, str]], normed: Dict[str, np.ndarray]) -> List[float]:
+    """Cosine distances for aligned (left_id, right_id) pairs with one einsum."""
+    if not pairs:
+        return []
 
-def calculate_parent_child_distances(nodes: Dict[str, Dict[str, Any]], embedder) -> None:
+    left = np.stack([normed[left_id] for left_id, _ in pairs]).astype(np.float32, copy=False)
+    right = np.stack([normed[right_id] for _, right_id in pairs]).astype(np.float32, copy=False)
+    return (1.0 - np.einsum('ij,ij->i', left, right)).tolist()
+
+
+def calculate_parent_child_distances(nodes: Dict[str, Dict[str, Any]], embedder,
+                                     normed: Optional[Dict[str, np.ndarray]] = None) -> None:
     """Calculate cosine distances between parent-child node pairs."""
-    for node_id, node in nodes.items():
-        parent_id = node.get('parent_id')
-        if parent_id and parent_id in nodes:
-            parent_embedding = nodes[parent_id].get('embedding')
-            node_embedding = node.get('embedding')
+    if normed is None:
+        normed = normalize_node_embeddings(nodes, embedder)
 
-            if parent_embedding and node_embedding:
-                distance = embedder.calculate_cosine_distance(
-                    parent_embedding, node_embedding
-                )
+    edges = [
+        (node_id, node.get('parent_id')) for node_id, node in nodes.items()
+        if node.get('parent_id') in normed and node_id in normed
+    ]
+    if not edges:
+        return
 
-                if 'derived' not in node:
-                    node['derived'] = {}
+    for (node_id, _), distance in zip(edges, paired_distances(edges, normed)):
+        node = nodes[node_id]
+        if 'derived' not in node:
+            node['derived'] = {}
 
-                node['derived']['semantic_distance_from_parent'] = distance
+        node['derived']['semantic_distance_from_parent'] = distance
 
 
-def calculate_sibling_distances(nodes: Dict[str, Dict[str, Any]], embedder) -> None:
+def calculate_sibling_distances(nodes: Dict[str, Dict[str, Any]], embedder,
+                                normed: Optional[Dict[str, np.ndarray]] = None) -> None:
     """Calculate average cosine distances between sibling nodes."""
+    if normed is None:
+        normed = normalize_node_embeddings(nodes, embedder)
+
+    groups = defaultdict(list)
     for node_id, node in nodes.items():
         parent_id = node.get('parent_id')
-        if parent_id and parent_id in nodes:
-            siblings = [
-                sib_id for sib_id, sib in nodes.items()
-                if sib.get('parent_id') == parent_id and sib_id != node_id
-            ]
+        if parent_id and parent_id in nodes and node_id in normed:
+            groups[parent_id].append(node_id)
 
-            if siblings and 'embedding' in node:
-                sibling_distances = []
-                for sib_id in siblings:
-                    if 'embedding' in nodes[sib_id]:
-                        distance = embedder.calculate_cosine_distance(
-                            node['embedding'], nodes[sib_id]['embedding']
-                        )
-                        sibling_distances.append(distance)
+    for sibling_ids in groups.values():
+        k = len(sibling_ids)
+        if k < 2:
+            continue
 
-                if sibling_distances:
-                    avg_sibling_distance = sum(sibling_distances) / len(sibling_distances)
+        # One matmul yields every pairwise similarity in the group
+        matrix = np.stack([normed[sib_id] for sib_id in sibling_ids]).astype(np.float32, copy=False)
+        sims = matrix @ matrix.T
+        avg_distances = 1.0 - (sims.sum(axis=1) - np.diag(sims)) / (k - 1)
 
-                    if 'derived' not in node:
-                        node['derived'] = {}
+        for sib_id, avg_sibling_distance in zip(sibling_ids, avg_distances):
+            node = nodes[sib_id]
+            if 'derived' not in node:
+                node['derived'] = {}
 
-                    node['derived']['avg_sibling_semantic_distance'] = avg_sibling_distance
+            node['derived']['avg_sibling_semantic_distance'] = float(avg_sibling_distance)
 
 
-def calculate_branch_mainline_distances(nodes: Dict[str, Dict[str, Any]], embedder) -> None:
+def calculate_branch_mainline_distances(nodes: Dict[str, Dict[str, Any]], embedder,
+                                        normed: Optional[Dict[str, np.ndarray]] = None) -> None:
     """Calculate semantic distance from branch nodes to mainline divergence points."""
+    if normed is None:
+        normed = normalize_node_embeddings(nodes, embedder)
+
     mainline_nodes = {
         node_id: node for node_id, node in nodes.items()
         if node.get('derived', {}).get('is_mainline', False)
@@ -74,19 +117,17 @@ def calculate_branch_mainline_distances(nodes: Dict[str, Dict[str, Any]], embedd
         if not node.get('derived', {}).get('is_mainline', False)
     }
 
+    matches = []
     for node_id, node in branch_nodes.items():
         divergence_point = node.get('derived', {}).get('mainline_divergence_point')
 
         if divergence_point and divergence_point in mainline_nodes:
-            branch_embedding = node.get('embedding')
-            mainline_embedding = mainline_nodes[divergence_point].get('embedding')
-
-            if branch_embedding and mainline_embedding:
-                distance = embedder.calculate_cosine_distance(
-                    branch_embedding, mainline_embedding
-                )
+            if node_id in normed and divergence_point in normed:
+                matches.append((node_id, divergence_point))
 
-                if 'derived' not in node:
-                    node['derived'] = {}
+    for (node_id, _), distance in zip(matches, paired_distances(matches, normed)):
+        node = nodes[node_id]
+        if 'derived' not in node:
+            node['derived'] = {}
 
-                node['derived']['semantic_distance_from_mainline'] = distance
+        node['derived']['semantic_distance_from_mainline'] = distance
@@ -1,68 +1,230 @@
 """Process conversation tree nodes and extract derived metadata."""
 
 import logging
+from collections import Counter
+from sys import intern
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional, Tuple
 
-from .path_analyzer import determine_mainline_path, compute_path_from_root, find_divergence_point
+from .pair_creator import find_user_assistant_edges
+from .path_analyzer import (
+    determine_mainline_path,
+    compute_path_from_root,
+    index_children,
+)
 
 logger = logging.getLogger(__name__)
 
+# Shared read-only stand-in for a missing sub-dict
+_EMPTY = MappingProxyType({})
 
-def process_nodes(mapping: Dict[str, Any], current_node_id: Optional[str]) -> Dict[str, Dict[str, Any]]:
+
+def process_nodes(mapping: Dict[str, Any], current_node_id: Optional[str],
+                  prune_hidden: bool = False) -> Dict[str, Dict[str, Any]]:
     """Transform node mapping into processed nodes with derived metadata."""
-    nodes = {}
+    return process_tree(mapping, current_node_id, prune_hidden)[0]
 
-    for node_id, node_data in mapping.items():
-        nodes[node_id] = extract_node_data(node_id, node_data)
 
-    mainline_path = determine_mainline_path(nodes, current_node_id)
-    mainline_nodes = set(mainline_path)
+def process_tree(mapping: Dict[str, Any], current_node_id: Optional[str],
+                 prune_hidden: bool = False) -> Tuple[Dict[str, Dict[str, Any]], List[Tuple[str, str]]]:
+    """Process nodes and collect user-to-assistant edges for pair creation.
+
+    Derived fields are filled in one root-to-leaf traversal: each node's path
+    and divergence point extend its parent's, and sibling aggregates are
+    computed once per parent as its children are pushed. With prune_hidden,
+    subtrees made only of hidden nodes are dropped before any of that work.
+
+    Returns processed nodes and (prompt_id, response_id) edges in node order.
+    """
+    pruned = find_hidden_subtrees(mapping, current_node_id) if prune_hidden else ()
+    if pruned:
+        logger.debug(f"Pruned {len(pruned)} hidden nodes")
 
+    # User nodes are noted during extraction so pair edges need no full scan
+    nodes = {}
+    prompt_ids = []
+    for node_id, node_data in mapping.items():
+        if node_id in pruned:
+            continue
+        node = extract_node_data(node_id, node_data)
+        if pruned:
+            node['children_ids'] = tuple(child_id for child_id in node['children_ids'] if child_id not in pruned)
+        nodes[node['id']] = node
+        if node['is_user']:
+            prompt_ids.append(node['id'])
+
+    # Root paths are unique, so a node is on the mainline exactly when it sits
+    # at its own depth in the mainline path; no membership set is needed
+    mainline_path = determine_mainline_path(nodes, current_node_id)
+    mainline_length = len(mainline_path)
+    roots, children_of = index_children(nodes)
+
+    # Last common node with the mainline; a mainline node is its own
+    divergence = {}
+
+    # (node_id, path_from_root, parent's family counts)
+    stack = [(root_id, (root_id,), None) for root_id in roots]
+
+    # Bind hot-loop lookups once; this pass visits every node
+    pop = stack.pop
+    push = stack.append
+    children_get = children_of.get
+    while stack:
+        node_id, path_from_root, family = pop()
+        node = nodes[node_id]
+        depth = len(path_from_root) - 1
+        on_mainline = depth < mainline_length and mainline_path[depth] == node_id
+        if on_mainline:
+            divergence_point = node_id
+        elif len(path_from_root) > 1:
+            divergence_point = divergence[path_from_root[-2]]
+        else:
+            divergence_point = None
+        divergence[node_id] = divergence_point
+        node['derived'] = _derived_fields(node_id, node, path_from_root, divergence_point,
+                                          on_mainline, family)
+
+        children = children_get(node_id)
+        if children:
+            node_family = _family_counts(nodes, node)
+            for child_id in children:
+                push((child_id, path_from_root + (child_id,), node_family))
+
+    # Nodes caught in a parent cycle are unreachable from any root
     for node_id, node in nodes.items():
+        if 'derived' in node:
+            continue
         path_from_root = compute_path_from_root(nodes, node_id)
-        node['derived'] = {
-            'path_from_root': path_from_root,
-            'is_mainline': node_id in mainline_nodes,
-            'is_terminal': not node['children_ids'],
-            'siblings_count': count_siblings(nodes, node_id),
-            'branch_depth': len(path_from_root) - 1 if path_from_root else 0,
-            'is_regeneration': is_regeneration(nodes, node_id),
-            'mainline_divergence_point': find_divergence_point(path_from_root, mainline_path) 
-                if not node_id in mainline_nodes else None,
-            'replaced_node_id': None,
-            'semantic_distance_from_parent': None,
-            'turn_number': compute_turn_number(nodes, node_id),
-            'generation_type': determine_generation_type(nodes, node_id)
-        }
+        on_mainline = node_id in mainline_path
+        if on_mainline:
+            divergence_point = node_id
+        elif len(path_from_root) > 1:
+            divergence_point = divergence.get(path_from_root[-2])
+        else:
+            divergence_point = None
+        divergence[node_id] = divergence_point
+        parent_id = node.get('parent_id')
+        family = _family_counts(nodes, nodes[parent_id]) if parent_id in nodes else None
+        node['derived'] = _derived_fields(node_id, node, path_from_root, divergence_point,
+                                          on_mainline, family)
+
+    return nodes, find_user_assistant_edges(nodes, prompt_ids)
+
+
+def _derived_fields(node_id: str, node: Dict[str, Any], path_from_root: Tuple[str, ...],
+                    divergence_point: Optional[str], on_mainline: bool,
+                    family: Optional[Tuple[bool, int, Counter, int]]) -> Dict[str, Any]:
+    """Build a node's derived metadata from its path and its parent's family counts."""
+    siblings_count = 0
+    regeneration = False
+    if family is not None:
+        parent_is_user, children_count, child_occurrences, non_user_children = family
+        siblings_count = children_count - child_occurrences[node_id]
+        regeneration = not node['is_user'] and parent_is_user and non_user_children > 1
+
+    derived = {
+        'path_from_root': path_from_root,
+        'is_mainline': on_mainline,
+        'is_terminal': not node['children_ids'],
+        'siblings_count': siblings_count,
+        'branch_depth': len(path_from_root) - 1 if path_from_root else 0,
+        'is_regeneration': regeneration,
+        'mainline_divergence_point': divergence_point
+            if not on_mainline else None,
+        'replaced_node_id': None,
+        'semantic_distance_from_parent': None,
+        'turn_number': len(path_from_root),
+        'generation_type': None
+    }
 
-    return nodes
+    # Classified from the stored flag, so the two fields cannot disagree
+    derived['generation_type'] = _generation_type(node, derived)
+    return derived
+
+
+def is_hidden(node_data: Dict[str, Any]) -> bool:
+    """Check if a raw node carries nothing shown in the conversation."""
+    message = node_data.get('message')
+    if not message:
+        return True
+    author = message.get('author')
+    if author and author.get('role') == 'system':
+        return True
+    metadata = message.get('metadata')
+    return bool(metadata and metadata.get('is_visually_hidden_from_conversation'))
+
+
+def find_hidden_subtrees(mapping: Dict[str, Any], current_node_id: Optional[str]) -> set:
+    """Find raw nodes whose whole subtree is hidden.
+
+    Works up from the leaves: a hidden node is pruned once all of its children
+    are. The current node is always kept, and so are its ancestors.
+    """
+    pending_children = dict.fromkeys(mapping, 0)
+    for node_data in mapping.values():
+        parent_id = node_data.get('parent')
+        if parent_id in pending_children:
+            pending_children[parent_id] += 1
+
+    pruned = set()
+    queue = [node_id for node_id, count in pending_children.items() if count == 0]
+    while queue:
+        node_id = queue.pop()
+        node_data = mapping[node_id]
+        if node_id == current_node_id or not is_hidden(node_data):
+            continue
+        pruned.add(node_id)
+        parent_id = node_data.get('parent')
+        if parent_id in pending_children:
+            pending_children[parent_id] -= 1
+            if pending_children[parent_id] == 0:
+                queue.append(parent_id)
+
+    return pruned
 
 
 def extract_node_data(node_id: str, node_data: Dict[str, Any]) -> Dict[str, Any]:
     """Extract node data from raw JSON."""
-    message = node_data.get('message', {})
-    content = message.get('content', {}) if message else {}
+    # Branch on the message once instead of building throwaway {} defaults
+    message = node_data.get('message')
+    if message:
+        content = message.get('content')
+        metadata = message.get('metadata') or _EMPTY
+        author = message.get('author')
+        role = author.get('role') if author else None
+        if role is not None:
+            role = intern(role)
+        create_time = message.get('create_time')
+    else:
+        content = None
+        metadata = _EMPTY
+        role = None
+        create_time = None
 
     text, content_type = _extract_content(content)
 
-    metadata = message.get('metadata', {}) if message else {}
-    author = message.get('author', {}) if message else {}
-
-    children = node_data.get('children', [])
+    # IDs recur in every path, children tuple and mainline set; share one copy of each
+    node_id = intern(node_id)
+    parent_id = node_data.get('parent')
+    if parent_id is not None:
+        parent_id = intern(parent_id)
+    children = tuple(intern(child_id) for child_id in node_data.get('children', ()))
 
     return {
         'id': node_id,
-        'parent_id': node_data.get('parent'),
+        'parent_id': parent_id,
         'children_ids': children,
+        'role': role,
+        'is_user': role == 'user',
         'message': {
             'author': {
-                'role': author.get('role') if author else None
+                'role': role
             },
             'content': {
                 'text': text,
                 'content_type': content_type
             },
-            'create_time': message.get('create_time') if message else None
+            'create_time': create_time
         },
         'metadata': {
             'model_slug': metadata.get('model_slug'),
@@ -87,11 +249,11 @@ def _extract_content(content: Any) -> Tuple[str, str]:
 
     # Handle ChatGPT JSON format with 'parts'
     if isinstance(content, dict) and 'parts' in content:
-        for part in content.get('parts', []):
-            if isinstance(part, str):
-                text += part
-            elif isinstance(part, dict) and 'text' in part:
-                text += part['text']
+        text = ''.join(
+            part if isinstance(part, str) else part['text']
+            for part in content['parts'] or ()
+            if isinstance(part, str) or (isinstance(part, dict) and 'text' in part)
+        )
     elif isinstance(content, str):
         text = content
     elif isinstance(content, dict) and 'text' in content:
@@ -100,43 +262,18 @@ def _extract_content(content: Any) -> Tuple[str, str]:
     return text, content_type
 
 
-def count_siblings(nodes: Dict[str, Dict[str, Any]], node_id: str) -> int:
-    """Count sibling nodes."""
-    node = nodes.get(node_id)
-    if not node:
-        return 0
-
-    parent_id = node.get('parent_id')
-    if not parent_id or parent_id not in nodes:
-        return 0
-
-    return len([
-        child_id for child_id in nodes[parent_id].get('children_ids', [])
-        if child_id != node_id
-    ])
-
-
-def is_regeneration(nodes: Dict[str, Dict[str, Any]], node_id: str) -> bool:
-    """Check if node is a regenerated response."""
-    node = nodes.get(node_id)
-    if not node or node.get('is_user'):
-        return False
-
-    parent_id = node.get('parent_id')
-    if not parent_id or parent_id not in nodes:
-        return False
+def _family_counts(nodes: Dict[str, Dict[str, Any]], parent: Dict[str, Any]) -> Tuple[bool, int, Counter, int]:
+    """Aggregate a parent's children once for O(1) sibling and regeneration checks.
 
-    parent = nodes[parent_id]
-    if not parent.get('is_user'):
-        return False
-
-    # Multiple assistant children of same prompt indicates regeneration
-    assistant_siblings = [
-        child_id for child_id in parent.get('children_ids', [])
-        if child_id in nodes and not nodes[child_id].get('is_user')
-    ]
-
-    return len(assistant_siblings) > 1
+    Returns whether the parent is a user node, its children count, occurrences
+    of each child ID, and how many children present in nodes are non-user.
+    """
+    children_ids = parent['children_ids']
+    non_user_children = sum(
+        1 for child_id in children_ids
+        if child_id in nodes and not nodes[child_id]['is_user']
+    )
+    return parent['is_user'], len(children_ids), Counter(children_ids), non_user_children
 
 
 def find_replaced_node(nodes: Dict[str, Dict[str, Any]], node_id: str) -> Optional[str]:
@@ -145,21 +282,13 @@ def find_replaced_node(nodes: Dict[str, Dict[str, Any]], node_id: str) -> Option
     return None
 
 
-def compute_turn_number(nodes: Dict[str, Dict[str, Any]], node_id: str) -> int:
-    """Compute 1-based turn number."""
-    path = compute_path_from_root(nodes, node_id)
-    return len(path)
-
-
-def determine_generation_type(nodes: Dict[str, Dict[str, Any]], node_id: str) -> str:
-    """Classify node generation type."""
-    node = nodes.get(node_id, {})
-
-    if node.get('is_user'):
-        if not node.get('parent_id'):
+def _generation_type(node: Dict[str, Any], derived: Dict[str, Any]) -> str:
+    """Classify a node from the regeneration flag already stored in its derived fields."""
+    if node['is_user']:
+        if not node['parent_id']:
             return 'initial_prompt'
         return 'user_continuation'
     else:
-        if is_regeneration(nodes, node_id):
+        if derived['is_regeneration']:
             return 'regeneration'
         return 'standard_response'
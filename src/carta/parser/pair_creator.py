@@ -1,47 +1,49 @@
 """Create prompt-response pairs from conversation nodes."""
 
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
-def create_pairs(nodes: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Extract user-assistant message pairs from node tree."""
-    pairs = []
+def find_user_assistant_edges(nodes: Dict[str, Dict[str, Any]],
+                              prompt_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+    """List (prompt_id, response_id) edges from user nodes to their assistant children."""
+    if prompt_ids is None:
+        prompt_ids = [node_id for node_id, node in nodes.items() if node['role'] == 'user']
+
+    return [
+        (prompt_id, child_id)
+        for prompt_id in prompt_ids
+        for child_id in nodes[prompt_id]['children_ids']
+        if child_id in nodes and nodes[child_id]['role'] == 'assistant'
+    ]
+
 
-    for node_id, node in nodes.items():
-        if not node or 'message' not in node:
-            continue
-
-        # Safe role extraction
-        author_role = node.get('message', {}).get('author', {}).get('role')
-        if author_role != 'user':
-            continue
-
-        for child_id in node.get('children_ids', []):
-            if child_id not in nodes:
-                continue
-
-            child_node = nodes[child_id]
-            child_author_role = child_node.get('message', {}).get('author', {}).get('role')
-            if child_author_role != 'assistant':
-                continue
-
-            is_mainline = (
-                node.get('derived', {}).get('is_mainline', False) and 
-                child_node.get('derived', {}).get('is_mainline', False)
-            )
-
-            pairs.append({
-                'id': f"{node_id}_{child_id}",
-                'prompt_id': node_id,
-                'response_id': child_id,
-                'is_mainline': is_mainline,
-                'is_alternate': not is_mainline,
-                'turn_number': child_node.get('derived', {}).get('turn_number', 0) // 2,
-                'branch_depth': child_node.get('derived', {}).get('branch_depth', 0),
-                'path_from_root': node.get('derived', {}).get('path_from_root', [])
-            })
+def create_pairs(nodes: Dict[str, Dict[str, Any]],
+                 edges: Optional[List[Tuple[str, str]]] = None) -> List[Dict[str, Any]]:
+    """Extract user-assistant message pairs from node tree.
+
+    edges, as returned by process_tree, skips the scan over all nodes.
+    """
+    if edges is None:
+        edges = find_user_assistant_edges(nodes)
+
+    pairs = []
+    for node_id, child_id in edges:
+        derived = nodes[node_id]['derived']
+        child_derived = nodes[child_id]['derived']
+        is_mainline = derived['is_mainline'] and child_derived['is_mainline']
+
+        pairs.append({
+            'id': f"{node_id}_{child_id}",
+            'prompt_id': node_id,
+            'response_id': child_id,
+            'is_mainline': is_mainline,
+            'is_alternate': not is_mainline,
+            'turn_number': child_derived['turn_number'] // 2,
+            'branch_depth': child_derived['branch_depth'],
+            'path_from_root': derived['path_from_root']
+        })
 
     return pairs
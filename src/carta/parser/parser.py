@@ -5,34 +5,93 @@ Extracts conversation architectures from ChatGPT JSON exports.
 Preserves branches + alternates + derived semantic parameters.
 """
 
+import hashlib
 import json
 import logging
+import os
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
-from .node_processor import process_nodes, extract_node_data
-from .path_analyzer import find_root_nodes, find_current_node, determine_mainline_path
+import orjson
+
+from .._json import loads
+from .node_processor import process_tree
+from .path_analyzer import find_root_nodes, find_current_node
 from .pair_creator import create_pairs
 
 logger = logging.getLogger(__name__)
 
+# Most recently used parse results kept in the cache directory
+PARSE_CACHE_MAX_ENTRIES = 128
+
+
+def _dumps(data: Any, indent: bool = False) -> bytes:
+    """Encode JSON with orjson, falling back to json for strings holding lone surrogates."""
+    try:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+    except orjson.JSONEncodeError:
+        return json.dumps(data, indent=2 if indent else None).encode('ascii')
+
+
+@lru_cache(maxsize=None)
+def _parser_code_digest() -> bytes:
+    """Digest of the parser sources, so cached results expire when parsing logic changes."""
+    digest = hashlib.sha256()
+    for source in sorted(Path(__file__).parent.glob('*.py')):
+        digest.update(source.read_bytes())
+    return digest.digest()
+
+
+def _restore_tuples(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn the ID sequences JSON stored as lists back into the tuples a fresh parse returns."""
+    for node in result['nodes'].values():
+        node['children_ids'] = tuple(node['children_ids'])
+        node['derived']['path_from_root'] = tuple(node['derived']['path_from_root'])
+    for pair in result['pairs']:
+        pair['path_from_root'] = tuple(pair['path_from_root'])
+    return result
+
 
 class CartaParser:
     """Parses ChatGPT JSON exports preserving full conversation tree structure."""
 
-    def __init__(self, output_dir: Optional[str] = None):
-        """Initialize parser with output directory."""
+    def __init__(self, output_dir: Optional[str] = None, prune_hidden: bool = False,
+                 cache_dir: Optional[str] = None):
+        """Initialize parser with output directory.
+
+        With prune_hidden, subtrees made only of system, empty or visually
+        hidden nodes are left out of the parsed tree. With cache_dir (or
+        CARTA_PARSE_CACHE_DIR), results are cached by export file content.
+        """
         self.output_dir = Path(output_dir) if output_dir else Path.cwd()
+        self.prune_hidden = prune_hidden
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        cache_dir = cache_dir or os.environ.get("CARTA_PARSE_CACHE_DIR")
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+
     def parse_file(self, filepath: str) -> List[Dict[str, Any]]:
         """Parse ChatGPT JSON export file."""
         logger.info(f"Parsing file: {filepath}")
 
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(filepath, 'rb') as f:
+                raw = f.read()
+        except Exception as e:
+            logger.error(f"Error loading JSON file: {e}")
+            return []
+
+        cache_path = self._cache_path(raw)
+        if cache_path is not None:
+            cached = self._load_cached(cache_path)
+            if cached is not None:
+                logger.info(f"Loaded {len(cached)} parsed conversations from cache")
+                return cached
+
+        try:
+            data = loads(raw)
         except Exception as e:
             logger.error(f"Error loading JSON file: {e}")
             return []
@@ -49,8 +108,56 @@ class CartaParser:
             if parsed_conversation:
                 results.append(parsed_conversation)
 
+        if cache_path is not None and results:
+            self._store_cached(cache_path, results)
+
         return results
 
+    def _cache_path(self, raw: bytes) -> Optional[Path]:
+        """Cache file for an export's bytes under the current parser code and options."""
+        if self.cache_dir is None:
+            return None
+
+        digest = hashlib.sha256(_parser_code_digest())
+        digest.update(b'prune' if self.prune_hidden else b'full')
+        digest.update(raw)
+        return self.cache_dir / f"{digest.hexdigest()}.parsed.json"
+
+    def _load_cached(self, cache_path: Path) -> Optional[List[Dict[str, Any]]]:
+        """Read a cached parse result, or None on a miss."""
+        try:
+            with open(cache_path, 'rb') as f:
+                results = loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {cache_path}: {e}")
+            return None
+
+        # Mark as recently used for eviction
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return [_restore_tuples(result) for result in results]
+
+    def _store_cached(self, cache_path: Path, results: List[Dict[str, Any]]) -> None:
+        """Write a parse result to the cache and evict the least recently used entries."""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(_dumps(results))
+            os.replace(tmp_path, cache_path)
+
+            entries = sorted(self.cache_dir.glob('*.parsed.json'), key=lambda path: path.stat().st_mtime)
+            for stale in entries[:-PARSE_CACHE_MAX_ENTRIES]:
+                stale.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Could not write parse cache entry {cache_path}: {e}")
+
     def _parse_conversation(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Parse single conversation data."""
         conversation = self._extract_conversation_metadata(data)
@@ -60,18 +167,18 @@ class CartaParser:
             logger.error("No mapping found in JSON file")
             return {}
 
-        root_nodes = self._find_root_nodes(mapping)
+        root_nodes = find_root_nodes(mapping)
         if not root_nodes:
             logger.error("No root nodes found in the conversation tree")
             return {}
 
         conversation['root_id'] = root_nodes[0] if root_nodes else None
 
-        current_node_id = self._find_current_node(data, mapping)
+        current_node_id = find_current_node(data, mapping)
         conversation['current_node'] = current_node_id
 
-        nodes = self._process_nodes(mapping, current_node_id)
-        pairs = self._create_pairs(nodes)
+        nodes, edges = process_tree(mapping, current_node_id, self.prune_hidden)
+        pairs = create_pairs(nodes, edges)
 
         return {
             'conversation': conversation,
@@ -89,133 +196,6 @@ class CartaParser:
             'default_model_slug': data.get('model', {}).get('slug') if data.get('model') else None
         }
 
-    def _find_root_nodes(self, mapping: Dict[str, Any]) -> List[str]:
-        """Find root nodes in conversation tree."""
-        return find_root_nodes(mapping)
-
-    def _find_current_node(self, data: Dict[str, Any], mapping: Dict[str, Any]) -> Optional[str]:
-        """Find current node ID (mainline endpoint)."""
-        return find_current_node(data, mapping)
-
-    def _process_nodes(self, mapping: Dict[str, Any], current_node_id: Optional[str]) -> Dict[str, Dict[str, Any]]:
-        """Process all nodes with derived parameters."""
-        return process_nodes(mapping, current_node_id)
-
-    def _extract_node_data(self, node_id: str, node_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract core node data from JSON."""
-        return extract_node_data(node_id, node_data)
-
-    def _determine_mainline_path(self, nodes: Dict[str, Dict[str, Any]], current_node_id: Optional[str]) -> List[str]:
-        """Determine mainline path from root to current node."""
-        return determine_mainline_path(nodes, current_node_id)
-
-    def _compute_path_from_root(self, nodes: Dict[str, Dict[str, Any]], node_id: str) -> List[str]:
-        """Compute path from root to given node."""
-        path = []
-        current = node_id
-
-        if node_id not in nodes:
-            return path
-
-        # Walk backwards to root
-        while current:
-            path.insert(0, current)
-            current = nodes[current]['parent_id']
-
-        return path
-
-    def _count_siblings(self, nodes: Dict[str, Dict[str, Any]], node_id: str) -> int:
-        """Count sibling nodes."""
-        if node_id not in nodes:
-            return 0
-
-        parent_id = nodes[node_id]['parent_id']
-        if not parent_id or parent_id not in nodes:
-            return 0
-
-        return len(nodes[parent_id]['children_ids'])
-
-    def _is_regeneration(self, nodes: Dict[str, Dict[str, Any]], node_id: str) -> bool:
-        """Determine if node is a regeneration (second+ child of user message)."""
-        if node_id not in nodes:
-            return False
-
-        parent_id = nodes[node_id]['parent_id']
-        if not parent_id or parent_id not in nodes:
-            return False
-
-        parent_role = nodes[parent_id]['message']['author'].get('role')
-        node_role = nodes[node_id]['message']['author'].get('role')
-
-        # Assistant following assistant suggests regeneration
-        if parent_role == 'assistant' and node_role == 'assistant':
-            return True
-
-        # Not first assistant response to user message
-        if parent_role == 'user' and node_role == 'assistant':
-            children = nodes[parent_id]['children_ids']
-            if children and children[0] != node_id:
-                return True
-
-        return False
-
-    def _find_divergence_point(self, path: List[str], mainline_path: List[str]) -> Optional[str]:
-        """Find where path diverges from mainline."""
-        if not path or not mainline_path:
-            return None
-
-        common_prefix_length = 0
-        max_length = min(len(path), len(mainline_path))
-
-        for i in range(max_length):
-            if path[i] == mainline_path[i]:
-                common_prefix_length = i + 1
-            else:
-                break
-
-        if common_prefix_length == 0:
-            return None
-
-        return path[common_prefix_length - 1]
-
-    def _find_replaced_node(self, nodes: Dict[str, Dict[str, Any]], node_id: str) -> Optional[str]:
-        """Find node this replaces (edited prompts). Placeholder implementation."""
-        # Requires metadata indicating edits/replacements
-        return None
-
-    def _compute_turn_number(self, nodes: Dict[str, Dict[str, Any]], node_id: str) -> int:
-        """Compute turn number for node."""
-        if node_id not in nodes:
-            return 0
-
-        path = self._compute_path_from_root(nodes, node_id)
-        return len(path)
-
-    def _determine_generation_type(self, nodes: Dict[str, Dict[str, Any]], node_id: str) -> str:
-        """Determine generation type: primary, regeneration, alternative, or edited."""
-        if node_id not in nodes:
-            return "unknown"
-
-        node = nodes[node_id]
-
-        if not node['parent_id']:
-            return "primary"
-
-        if node['derived']['is_regeneration']:
-            return "regeneration"
-
-        if node['derived']['replaced_node_id']:
-            return "edited"
-
-        if not node['derived']['is_mainline']:
-            return "alternative"
-
-        return "primary"
-
-    def _create_pairs(self, nodes: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Create prompt-response pairs from nodes."""
-        return create_pairs(nodes)
-
     def save_to_json(self, parsed_data: List[Dict[str, Any]], output_filename: Optional[str] = None) -> str:
         """Save parsed data to JSON file."""
         if not parsed_data:
@@ -237,8 +217,8 @@ class CartaParser:
         try:
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(parsed_data, f, indent=2)
+            with open(output_path, 'wb') as f:
+                f.write(_dumps(parsed_data, indent=True))
             logger.info(f"Saved parsed data to {output_path}")
             return str(output_path)
         except Exception as e:
@@ -1,7 +1,8 @@
 """Path analysis for conversation trees."""
 
 import logging
-from typing import Dict, List, Any, Optional
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -26,61 +27,47 @@ def find_current_node(data: Dict[str, Any], mapping: Dict[str, Any]) -> Optional
     return root_nodes[-1] if root_nodes else None
 
 
-def determine_mainline_path(nodes: Dict[str, Dict[str, Any]], current_node_id: Optional[str]) -> List[str]:
+def determine_mainline_path(nodes: Dict[str, Dict[str, Any]], current_node_id: Optional[str]) -> Tuple[str, ...]:
     """Determine mainline path from root to current node."""
-    if current_node_id is None or current_node_id not in nodes:
-        return []
-
-    # Traverse up from current node to root
-    mainline_path = []
-    node_id = current_node_id
-    while node_id:
-        mainline_path.append(node_id)
-        parent_id = nodes[node_id].get('parent_id')
-        if parent_id is None or parent_id not in nodes:
-            break
-        node_id = parent_id
+    if current_node_id is None:
+        return ()
+    return compute_path_from_root(nodes, current_node_id)
 
-    mainline_path.reverse()
-    return mainline_path
 
-
-def compute_path_from_root(nodes: Dict[str, Dict[str, Any]], node_id: str) -> List[str]:
+def compute_path_from_root(nodes: Dict[str, Dict[str, Any]], node_id: str) -> Tuple[str, ...]:
     """Compute path from root to given node."""
     if node_id not in nodes:
-        return []
+        return ()
 
     path = []
+    visited = set()
     current_id = node_id
 
     while current_id:
         path.append(current_id)
-        parent_id = nodes[current_id].get('parent_id')
+        visited.add(current_id)
+        parent_id = nodes[current_id]['parent_id']
         if parent_id is None or parent_id not in nodes:
             break
         current_id = parent_id
 
         # Prevent infinite loops from circular references
-        if current_id in path:
+        if current_id in visited:
             logger.error(f"Circular reference detected in path: {current_id}")
             break
 
     path.reverse()
-    return path
-
+    return tuple(path)
 
-def find_divergence_point(path: List[str], mainline_path: List[str]) -> Optional[str]:
-    """Find last common node before paths diverge."""
-    if not path or not mainline_path:
-        return None
 
-    last_common = None
-    min_length = min(len(path), len(mainline_path))
-
-    for i in range(min_length):
-        if path[i] == mainline_path[i]:
-            last_common = path[i]
+def index_children(nodes: Dict[str, Dict[str, Any]]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Split nodes into roots and a parent_id -> child IDs index."""
+    children_of = defaultdict(list)
+    roots = []
+    for node_id, node in nodes.items():
+        parent_id = node.get('parent_id')
+        if parent_id is None or parent_id not in nodes:
+            roots.append(node_id)
         else:
-            break
-
-    return last_common
+            children_of[parent_id].append(node_id)
+    return roots, children_of
@@ -7,17 +7,28 @@ workflow: (1) parsing ChatGPT JSON exports into conversation trees,
 """
 
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
 from .parser import CartaParser
 from .embedder import CartaEmbedder
 from .db import DatabaseClient
-from .config import Config
+from .config import Config, get_config
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_export(file_path: str) -> List[Dict[str, Any]]:
+    """Parse one export file in a worker process."""
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Input file not found: {path}")
+    return CartaParser().parse_file(str(path))
+
+
 class Pipeline:
     """Conversation tree integration pipeline."""
 
@@ -28,11 +39,11 @@ class Pipeline:
         """Initialize the pipeline.
 
         Args:
-            config: Configuration object. If None, creates a new Config instance.
+            config: Configuration object. If None, uses the shared process-wide Config.
             store_to_database: Whether to store results to database
             output_dir: Optional output directory for JSON files
         """
-        self.config = config or Config()
+        self.config = config or get_config()
         self.store_to_database = store_to_database
 
         # Validate configuration requirements
@@ -80,8 +91,22 @@ class Pipeline:
 
         # Step 1: Parse conversation tree structure
         logger.info("Parsing conversation tree...")
-        conversations = self.parser.parse_file(str(file_path))
+        conversations = self._parse(file_path, self.parser.parse_file(str(file_path)), save_intermediates)
+        if not conversations:
+            return []
+
+        # Step 2: Generate semantic embeddings
+        enriched_conversations = self._embed(file_path, conversations, save_intermediates)
+
+        # Step 3: Store to database (if configured)
+        conversation_ids = self._store(enriched_conversations)
+
+        logger.info(f"Pipeline complete. Processed {len(conversation_ids)} conversations")
+        return conversation_ids
 
+    def _parse(self, file_path: Path, conversations: List[Dict[str, Any]],
+               save_intermediates: bool) -> List[Dict[str, Any]]:
+        """Check parsed conversations and optionally save them to disk."""
         if not conversations:
             logger.error("Failed to parse conversation")
             return []
@@ -94,14 +119,13 @@ class Pipeline:
             saved_path = self.parser.save_to_json(conversations, parsed_file)
             logger.info(f"Saved parsed data to {saved_path}")
 
-        # Step 2: Generate semantic embeddings
-        logger.info("Generating semantic embeddings...")
-        enriched_conversations = []
+        return conversations
 
-        for i, conversation in enumerate(conversations):
-            logger.info(f"Embedding conversation {i+1}/{len(conversations)}")
-            enriched = self.embedder.process_conversation(conversation)
-            enriched_conversations.append(enriched)
+    def _embed(self, file_path: Path, conversations: List[Dict[str, Any]],
+               save_intermediates: bool) -> List[Dict[str, Any]]:
+        """Generate semantic embeddings for parsed conversations."""
+        logger.info(f"Generating semantic embeddings for {len(conversations)} conversations...")
+        enriched_conversations = self.embedder.process_conversations(conversations)
 
         logger.info("Embeddings generation complete")
 
@@ -111,11 +135,21 @@ class Pipeline:
             self.embedder.save_to_json(enriched_conversations, embedded_file)
             logger.info(f"Saved embedded data to {embedded_file}")
 
-        # Step 3: Store to database (if configured)
+        return enriched_conversations
+
+    def _store(self, enriched_conversations: List[Dict[str, Any]]) -> List[str]:
+        """Store enriched conversations, returning their IDs."""
         conversation_ids = []
         if self.store_to_database:
             logger.info("Storing to database...")
 
+            try:
+                conversation_ids = self.db_client.store_conversations_bulk(enriched_conversations)
+                logger.info(f"Database storage complete. Stored {len(conversation_ids)} conversations")
+                return conversation_ids
+            except Exception as e:
+                logger.error(f"Bulk storage failed, storing conversations one at a time: {e}")
+
             for i, conversation in enumerate(enriched_conversations):
                 logger.info(f"Storing conversation {i+1}/{len(enriched_conversations)}")
                 try:
@@ -131,30 +165,78 @@ class Pipeline:
                 conv_id = conversation.get('conversation', {}).get('id', 'unknown')
                 conversation_ids.append(conv_id)
 
-        logger.info(f"Pipeline complete. Processed {len(conversation_ids)} conversations")
         return conversation_ids
 
-    def process_files(self, file_paths: List[str], save_intermediates: bool = False) -> Dict[str, List[str]]:
+    def process_files(self, file_paths: List[str], save_intermediates: bool = False,
+                      parse_workers: Optional[int] = None,
+                      embed_workers: int = 4) -> Dict[str, List[str]]:
         """Process multiple ChatGPT JSON export files.
 
+        Files are parsed on a process pool and embedded on a thread pool;
+        database writes stay on the calling thread, in input order.
+
         Args:
             file_paths: List of paths to ChatGPT JSON export files
             save_intermediates: save intermediate JSON files to disk
+            parse_workers: Parser processes. If None, uses the CPU count.
+            embed_workers: Threads embedding files concurrently
 
         Returns:
             Dictionary mapping file paths to lists of conversation IDs
         """
+        file_paths = list(dict.fromkeys(file_paths))
         results = {}
 
-        for file_path in file_paths:
-            try:
-                conversation_ids = self.process_file(file_path, save_intermediates)
-                results[file_path] = conversation_ids
-                logger.info(f"Successfully processed {file_path}: {len(conversation_ids)} conversations")
-            except Exception as e:
-                logger.error(f"Failed to process {file_path}: {e}")
-                results[file_path] = []
+        if len(file_paths) <= 1:
+            for file_path in file_paths:
+                try:
+                    conversation_ids = self.process_file(file_path, save_intermediates)
+                    results[file_path] = conversation_ids
+                    logger.info(f"Successfully processed {file_path}: {len(conversation_ids)} conversations")
+                except Exception as e:
+                    logger.error(f"Failed to process {file_path}: {e}")
+                    results[file_path] = []
+            return results
+
+        workers = min(parse_workers or os.cpu_count() or 1, len(file_paths))
+        embedded = {}
+
+        # Spawned workers do not inherit the database pool, cache handles or locks held by other threads
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as parse_pool, \
+                ThreadPoolExecutor(max_workers=embed_workers) as embed_pool:
+            parsed = {parse_pool.submit(_parse_export, file_path): file_path for file_path in file_paths}
+
+            # Hand each file to the embedding pool as soon as it is parsed
+            for future in as_completed(parsed):
+                file_path = parsed[future]
+                try:
+                    conversations = self._parse(Path(file_path), future.result(), save_intermediates)
+                except Exception as e:
+                    logger.error(f"Failed to process {file_path}: {e}")
+                    results[file_path] = []
+                    continue
+
+                if conversations:
+                    embedded[file_path] = embed_pool.submit(
+                        self._embed, Path(file_path), conversations, save_intermediates
+                    )
+                else:
+                    results[file_path] = []
+
+            # Single-threaded database sink, in input order
+            for file_path in file_paths:
+                if file_path not in embedded:
+                    continue
+                try:
+                    conversation_ids = self._store(embedded[file_path].result())
+                    results[file_path] = conversation_ids
+                    logger.info(f"Successfully processed {file_path}: {len(conversation_ids)} conversations")
+                except Exception as e:
+                    logger.error(f"Failed to process {file_path}: {e}")
+                    results[file_path] = []
 
+        results = {file_path: results[file_path] for file_path in file_paths}
         total_conversations = sum(len(conv_ids) for conv_ids in results.values())
         logger.info(f"Batch processing complete. Total conversations processed: {total_conversations}")
 
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Precision check for float16 normalized embeddings against float32."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.carta.embedder.openai_utils import OpenAIEmbedder
+
+
+def test_float16_cosine_drift() -> None:
+    """Cosines from float16 unit vectors stay within 1e-3 of float32 cosines."""
+    rng = np.random.default_rng(0)
+    n, dimension = 512, 2000
+
+    # Half random directions, half near-duplicates, to cover both ends of the cosine range
+    base = rng.standard_normal((n // 2, dimension)).astype(np.float32)
+    similar = base + 0.1 * rng.standard_normal((n // 2, dimension)).astype(np.float32)
+    sample = np.vstack([base, similar])
+
+    embedder = OpenAIEmbedder(api_key="test")
+    half = embedder.normalize_embeddings(sample).astype(np.float32)
+
+    full = sample / np.linalg.norm(sample, axis=1, keepdims=True)
+
+    drift = np.abs(half @ half.T - full @ full.T).max()
+    print(f"Max absolute cosine error: {drift:.2e}")
+    assert drift < 1e-3
+
+
+if __name__ == "__main__":
+    test_float16_cosine_drift()